@@ -0,0 +1,13 @@
+# css_util.py
+# ─────────────────────────────────────────────────────────────
+# 앱들이 함께 쓰는 CSS 압축 (Streamlit 의존성 없음)
+#   - Study Coach(study_core)와 강 건너기 퍼즐(vetagame_001)이 같은 규칙으로
+#     <style> 블록을 한 번만 줄여 보낸다
+# ─────────────────────────────────────────────────────────────
+import re
+
+def minify_css(css):
+    """주석·줄바꿈·불필요한 공백 제거"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import altair as alt
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import mbti_core as core
 
 st.set_page_config(page_title="MBTI 국가별 TOP10", layout="wide")
 st.title("🌍 MBTI 유형별 국가 TOP 10 대시보드")
@@ -10,104 +13,312 @@ st.title("🌍 MBTI 유형별 국가 TOP 10 대시보드")
 DATA_FILENAME = "countriesMBTI_16types.csv"
 
 # -----------------------------
-# 1) 데이터 로딩
+# 1) 데이터 로딩 (파이프라인은 mbti_core, 여기서는 캐시만 담당)
+# -----------------------------
+# CSV는 내용 해시당 한 번만 Feather로 변환되고, 정규화 결과(MBTIDataset)는
+# st.cache_resource로 모든 세션이 참조로 공유한다.
+@st.cache_resource(show_spinner=False)
+def watched_csv(path):
+    # 프로세스 공용 감시자: 파일 끝에 행이 추가되면 그 부분만 파싱해 병합
+    return core.WatchedCSV(path)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_upload(file_id, _raw):
+    # 업로드 파일은 file_id 기준으로 한 번만 해시·변환
+    return core.ingest_csv(_raw)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def normalize(version):
+    """스키마 탐지 + 비율 변환 + 랭킹을 데이터셋 버전당 한 번만 수행."""
+    return core.normalize(version)
+
+@st.cache_resource(show_spinner="대용량 CSV를 스트리밍으로 읽는 중…", max_entries=4)
+def stream_local(path, mtime, size):
+    return core.stream_topn(f"{path}@{mtime}:{size}", path)
+
+@st.cache_resource(show_spinner="대용량 CSV를 스트리밍으로 읽는 중…", max_entries=4)
+def stream_upload(file_id, _file):
+    return core.stream_topn(f"upload:{file_id}", _file)
+
+# -----------------------------
+# 2) 데이터 소스 선택
 # -----------------------------
-@st.cache_data
 def load_data():
+    """공유 MBTIDataset 반환. 큰 파일은 스트리밍, 나머지는 Feather 캐시 경유."""
     if os.path.exists(DATA_FILENAME):
         # 같은 폴더에 파일이 있으면 자동으로 읽기
-        return pd.read_csv(DATA_FILENAME)
-    else:
-        return None
+        stat = os.stat(DATA_FILENAME)
+        if stat.st_size > core.STREAM_THRESHOLD:
+            return stream_local(DATA_FILENAME, stat.st_mtime_ns, stat.st_size)
+        return watched_csv(DATA_FILENAME).refresh()
 
-df = load_data()
-
-if df is None:
     st.info("💡 같은 폴더에 CSV 파일이 없어요. 아래에서 직접 업로드 해주세요.")
     uploaded_file = st.file_uploader("CSV 파일 업로드 (.csv)", type=["csv"])
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
-
-if df is not None:
-    # -----------------------------
-    # 2) MBTI 컬럼 정규화
-    # -----------------------------
-    df.columns = [str(c).strip() for c in df.columns]
-
-    MBTI_TYPES = [
-        "INTJ","INTP","ENTJ","ENTP",
-        "INFJ","INFP","ENFJ","ENFP",
-        "ISTJ","ISFJ","ESTJ","ESFJ",
-        "ISTP","ISFP","ESTP","ESFP",
-    ]
-
-    # 국가 컬럼 자동 탐지
-    country_col = next((c for c in df.columns if any(k in c.upper() for k in ["COUNTRY","NATION","국가","나라"])), df.columns[0])
-
-    mbti_cols = [c for c in df.columns if c.upper().replace("%","").replace("(","").replace(")","").replace(" ","") in MBTI_TYPES]
-
-    # 숫자 변환 + % 처리
-    for c in mbti_cols:
-        df[c] = (
-            df[c].astype(str)
-                 .str.replace("%","", regex=False)
-                 .str.replace(",","", regex=False)
-                 .str.strip()
-                 .replace({"": np.nan, "nan": np.nan})
-                 .astype(float)
-        )
-    if mbti_cols:
-        sample = pd.concat([df[c].dropna() for c in mbti_cols])
-        if len(sample) > 0 and sample.quantile(0.95) <= 1.5:
-            for c in mbti_cols:
-                df[c] = df[c] * 100.0
-
-    # -----------------------------
-    # 3) UI - MBTI 유형 선택
-    # -----------------------------
-    selected_type = st.selectbox("분석할 MBTI 유형", options=MBTI_TYPES, index=0)
-    top_n = st.slider("TOP N 국가 수", 5, 20, 10)
-
-    val_col = next((c for c in mbti_cols if c.upper().replace("%","").replace("(","").replace(")","").replace(" ","") == selected_type), None)
-
-    if val_col is None:
-        st.error("선택한 유형에 맞는 데이터 컬럼이 없습니다.")
+        if uploaded_file.size > core.STREAM_THRESHOLD:
+            return stream_upload(uploaded_file.file_id, uploaded_file)
+        return normalize(load_upload(uploaded_file.file_id, uploaded_file.getvalue()))
+    return None
+
+ds = load_data()
+
+# -----------------------------
+# 2-1) 내보내기 (다운로드 요청 시에만 생성)
+# -----------------------------
+@st.cache_data(show_spinner=False, max_entries=256)
+def export_csv(version, selected_type, top_n, _ds):
+    """유형별 TOP-N CSV 바이트. (데이터셋 버전, 유형, N)별로 한 번만 만든다."""
+    return core.top_csv(_ds, selected_type, top_n)
+
+@st.cache_resource
+def export_jobs():
+    """프로세스 공용 내보내기 워커와 (버전, N, 형식) → Future 목록"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="mbti-export"), {}, threading.Lock()
+
+def submit_bulk_export(ds, top_n, fmt):
+    """같은 조합은 이미 만든(또는 만드는 중인) 작업을 재사용.
+    데이터가 바뀌면(버전 변경) 이전 버전의 끝난 작업과 ZIP 바이트는 버린다."""
+    pool, jobs, lock = export_jobs()
+    key = (ds.version, top_n, fmt)
+    with lock:
+        for old in [k for k, f in jobs.items() if k[0] != ds.version and f.done()]:
+            del jobs[old]
+        if key not in jobs or (jobs[key].done() and jobs[key].exception()):
+            jobs[key] = pool.submit(core.build_bulk_zip, ds, top_n, fmt)
+        return jobs[key]
+
+# -----------------------------
+# 3) UI - 화면 구성
+# -----------------------------
+# 차트 스펙(데이터 제외)은 (데이터셋 버전, 유형, N) 조합당 한 번만 만든다.
+# 데이터는 st.vega_lite_chart에 DataFrame으로 넘겨 Arrow로 전송.
+@st.cache_data(show_spinner=False, max_entries=256)
+def bar_chart_spec(version, selected_type, top_n, _work):
+    return core.bar_chart_spec(_work, selected_type)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def heatmap_spec(version, top_n, _grid, types):
+    return core.heatmap_spec(_grid, types, top_n)
+
+def single_view(ds, selected_type, top_n):
+    """선택한 한 유형의 TOP-N 표·막대그래프·CSV 다운로드"""
+    # TOP-N = 미리 정렬된 순서의 앞부분 슬라이스 (정렬·dropna 없음)
+    work = ds.top(selected_type, top_n)
+
+    st.subheader(f"🧭 {selected_type} 비율 상위 {len(work)}개 국가")
+    st.dataframe(work.reset_index(drop=True), use_container_width=True)
+
+    # 스펙은 (데이터셋 버전, 유형, N)별로 캐시, 데이터는 Arrow로 따로 전송
+    spec = bar_chart_spec(ds.version, selected_type, top_n, _work=work)
+    st.vega_lite_chart(work, spec, use_container_width=True)
+
+    st.download_button(
+        "⬇️ CSV 저장",
+        data=partial(export_csv, ds.version, selected_type, top_n, _ds=ds),   # 클릭할 때만 생성
+        file_name=f"top_{top_n}_{selected_type}.csv",
+        mime="text/csv",
+        on_click="ignore",
+    )
+
+def compare_view(ds, top_n):
+    """16개 유형 TOP-N을 한 번에 계산해 (순위 x 유형) 히트맵으로 표시"""
+    grid = ds.top_all(top_n)
+
+    st.subheader(f"🗺️ 16개 유형별 상위 {top_n}개 국가 한눈에 보기")
+
+    st.vega_lite_chart(grid, heatmap_spec(ds.version, top_n, _grid=grid, types=ds.types), use_container_width=True)
+
+    table = grid.pivot(index="Rank", columns="Type", values="Country")
+    st.dataframe(table[[t for t in ds.types if t in table.columns]], use_container_width=True)
+
+@st.cache_resource(show_spinner=False)
+def load_regions():
+    return core.load_regions()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def region_summary(version, weighted, _ds):
+    """대륙별 집계 (데이터셋 버전 x 가중 여부당 한 번)"""
+    return core.region_summary(_ds, load_regions(), weighted=weighted)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def region_bar_spec(version, metric, weighted, _long, title):
+    return core.region_bar_spec(_long, title)
+
+AXIS_PAIRS = {"E vs I": ["E", "I"], "N vs S": ["N", "S"], "T vs F": ["T", "F"], "J vs P": ["J", "P"]}
+
+def region_view(ds):
+    """대륙별 유형 평균 / 인구 가중 비율 / 성향축(E-I, N-S, T-F, J-P) 합계"""
+    if ds.streamed:
+        st.info("스트리밍 모드에서는 TOP-N 행만 보관하므로 대륙 집계를 지원하지 않습니다.")
+        return
+    if not ds.types:
+        st.error("MBTI 유형에 맞는 데이터 컬럼이 없습니다.")
+        return
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        metric = st.selectbox("지표", list(AXIS_PAIRS) + list(ds.types), key="region_metric")
+    with c2:
+        weighted = st.toggle("인구 가중 평균", value=False, key="region_weighted")
+
+    summary = region_summary(ds.version, weighted, _ds=ds)
+    series = AXIS_PAIRS.get(metric, [metric])
+    long = summary[series].reset_index().melt(id_vars="Region", var_name="Series", value_name="Value").dropna()
+
+    kind = "인구 가중 평균" if weighted else "국가 단순 평균"
+    st.subheader(f"🌏 대륙별 {metric} ({kind})")
+    title = f"대륙별 {metric} ({kind})"
+    st.vega_lite_chart(long, region_bar_spec(ds.version, metric, weighted, _long=long, title=title), use_container_width=True)
+    st.dataframe(summary.round(2), use_container_width=True)
+    unknown = int(summary["Countries"].get("Unknown", 0))
+    if unknown:
+        st.caption(f"ℹ️ 대륙 표(country_regions.csv)에 없는 국가 {unknown}개는 Unknown으로 묶었습니다.")
+
+@st.cache_resource(show_spinner="유사도 인덱스를 만드는 중…", max_entries=2, ttl=3600)
+def similarity_index(version, _ds):
+    """정규화된 프로필 행렬 (데이터셋 버전당 한 번).
+    CSV에 행이 추가될 때마다 버전이 바뀌므로 최근 버전 몇 개만 남긴다 (n x 16 행렬 두 개씩)."""
+    return core.SimilarityIndex(_ds)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def profile_spec(version, _long, types):
+    return core.profile_spec(_long, types)
+
+def similar_view(ds):
+    """선택한 국가와 16개 유형 분포가 가장 비슷한 국가 k개"""
+    if ds.streamed:
+        st.info("스트리밍 모드에서는 TOP-N 행만 보관하므로 유사도 검색을 지원하지 않습니다.")
+        return
+    index = similarity_index(ds.version, _ds=ds)
+    c1, c2, c3 = st.columns([2, 1, 1])
+    with c1:
+        country = st.selectbox("기준 국가", list(ds.country.categories), key="similar_country")
+    with c2:
+        metric = st.radio("거리", ["cosine", "l1"], horizontal=True, key="similar_metric")
+    with c3:
+        k = st.slider("국가 수", 3, core.TOP_N_MAX, 5, key="similar_k")
+
+    # 이름이 겹치는 행이 있어도 그래프가 표와 같은 행을 쓰도록 행 번호를 그대로 받는다
+    row = index.row_of(country)
+    neighbors, value = index.query(row, k, metric)
+    result = index.frame(neighbors, value, metric)
+    st.subheader(f"🔎 {country}와(과) MBTI 분포가 비슷한 국가 {len(result)}곳")
+    st.dataframe(result, use_container_width=True)
+
+    # 기준 국가 + 상위 3개 국가의 유형별 비율 비교
+    rows = [row] + list(neighbors[:3])
+    long = pd.DataFrame(ds.shares[rows], columns=ds.types)
+    long.insert(0, "Country", [country] + list(result["Country"][:3]))
+    long = long.melt(id_vars="Country", var_name="Type", value_name="Share(%)")
+    st.vega_lite_chart(long, profile_spec(ds.version, _long=long, types=ds.types), use_container_width=True)
+
+def snapshot_signature(folder=core.SNAPSHOT_DIR):
+    """연도 CSV 폴더의 (파일명, mtime, 크기) 목록 — 바뀔 때만 저장소를 다시 동기화"""
+    if not os.path.isdir(folder):
+        return ()
+    return tuple(
+        (e.name, e.stat().st_mtime_ns, e.stat().st_size)
+        for e in sorted(os.scandir(folder), key=lambda e: e.name)
+        if e.name.lower().endswith(".csv") and core.snapshot_year(e.name)
+    )
+
+@st.cache_resource(show_spinner="연도별 스냅숏을 정리하는 중…", max_entries=2)
+def snapshot_store(signature):
+    store = core.SnapshotStore()
+    core.sync_snapshots(store)
+    return store
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def rank_history(signature, mbti_type, years, top_n):
+    return snapshot_store(signature).rank_history(mbti_type, list(years), top_n)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def history_spec(signature, mbti_type, years, top_n, _long):
+    # 스펙에 마지막 연도(라벨 위치)가 들어가므로 연도 범위도 키에 포함
+    return core.history_spec(_long, mbti_type, top_n)
+
+def history_view(signature):
+    """snapshots/ 폴더의 연도별 CSV로 유형별 국가 순위 변화"""
+    years = snapshot_store(signature).years()
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        mbti_type = st.selectbox("MBTI 유형", core.MBTI_TYPES, key="history_type")
+    with c2:
+        if len(years) > 1:
+            lo, hi = st.select_slider("연도 범위", options=years, value=(years[0], years[-1]), key="history_years")
+        else:
+            lo = hi = years[0]
+    top_n = st.slider("TOP N 국가 수", 3, core.TOP_N_MAX, 10, key="history_top")
+
+    chosen = tuple(y for y in years if lo <= y <= hi)
+    long = rank_history(signature, mbti_type, chosen, top_n)
+    if long.empty:
+        st.info("선택한 연도에 해당 유형 데이터가 없습니다.")
+        return
+    st.subheader(f"📈 {mbti_type} 국가 순위 변화 ({lo}–{hi})")
+    st.vega_lite_chart(long, history_spec(signature, mbti_type, chosen, top_n, _long=long), use_container_width=True)
+    # 끝 연도 스냅숏에 이 유형 열이 없을 수 있으므로 실제로 있는 마지막 연도로 정렬
+    table = long.pivot(index="Country", columns="Year", values="Rank")
+    st.dataframe(table.sort_values(table.columns[-1]), use_container_width=True)
+
+@st.fragment(run_every=1)
+def bulk_export_progress(future):
+    """작업이 끝날 때까지 이 조각만 1초마다 다시 그리고, 끝나면 전체를 한 번 갱신"""
+    if future.done():
+        st.rerun()
+    st.info("⏳ ZIP 파일을 만드는 중입니다… 다른 화면을 계속 보셔도 돼요.")
+
+def bulk_export_panel(ds, top_n):
+    """16개 유형 TOP-N 일괄 내보내기 (백그라운드 작업)"""
+    with st.expander("📦 16개 유형 일괄 내보내기 (ZIP)"):
+        fmt = st.radio("파일 형식", ["csv", "parquet"], horizontal=True, key="bulk_fmt")
+        if st.button(f"TOP {top_n} × 16개 유형 ZIP 만들기", key="bulk_go"):
+            st.session_state.bulk_export = submit_bulk_export(ds, top_n, fmt), top_n, fmt
+
+        if "bulk_export" not in st.session_state:
+            return
+        future, n, f = st.session_state.bulk_export
+        if not future.done():
+            bulk_export_progress(future)
+        elif future.exception():
+            st.error(f"내보내기에 실패했습니다: {future.exception()}")
+        else:
+            st.download_button(
+                f"⬇️ top_{n}_all_types_{f}.zip",
+                data=future.result(),
+                file_name=f"top_{n}_all_types_{f}.zip",
+                mime="application/zip",
+                on_click="ignore",
+            )
+
+if ds is not None:
+    if ds.streamed:
+        st.caption(f"📦 스트리밍 모드: {ds.rows:,}행을 청크 단위로 처리했습니다.")
+
+    modes = ["유형별 TOP N", "16개 유형 비교", "대륙·성향축 집계", "비슷한 국가 찾기"]
+    signature = snapshot_signature()
+    if signature:
+        modes.append("연도별 순위 변화")
+    mode = st.radio("보기 방식", modes, horizontal=True)
+    top_n = None
+    if mode == "연도별 순위 변화":
+        history_view(signature)
+    elif mode == "비슷한 국가 찾기":
+        similar_view(ds)
+    elif mode == "대륙·성향축 집계":
+        region_view(ds)
+    elif mode == "16개 유형 비교":
+        top_n = st.slider("TOP N 국가 수", 5, core.TOP_N_MAX, 10)
+        compare_view(ds, top_n)
     else:
-        work = df[[country_col, val_col]].dropna()
-        work = work.rename(columns={country_col: "Country", val_col: "Share(%)"})
-        work = work.sort_values("Share(%)", ascending=False).head(top_n)
-
-        st.subheader(f"🧭 {selected_type} 비율 상위 {len(work)}개 국가")
-        st.dataframe(work.reset_index(drop=True), use_container_width=True)
-
-        highlight = alt.selection_point(on="mouseover", fields=["Country"], nearest=True, empty=False)
-
-        base = alt.Chart(work).encode(
-            x=alt.X("Share(%):Q", title="Share (%)", scale=alt.Scale(domain=[0, float(work["Share(%)"].max()) * 1.1])),
-            y=alt.Y("Country:N", sort='-x', title=None),
-            tooltip=["Country", alt.Tooltip("Share(%):Q", format=".2f")]
-        )
-
-        bars = base.mark_bar().encode(
-            color=alt.condition(highlight, alt.value("#1f77b4"), alt.value("#a6bddb"))
-        ).add_params(highlight)
-
-        text = base.mark_text(align="left", dx=4).encode(
-            text=alt.Text("Share(%):Q", format=".2f")
-        )
-
-        chart = (bars + text).properties(
-            height=40 * len(work) + 10,
-            title=f"{selected_type} 비율이 높은 국가 TOP {len(work)}"
-        ).interactive()
-
-        st.altair_chart(chart, use_container_width=True)
-
-        st.download_button(
-            "⬇️ CSV 저장",
-            data=work.to_csv(index=False).encode("utf-8"),
-            file_name=f"top_{top_n}_{selected_type}.csv",
-            mime="text/csv",
-        )
+        selected_type = st.selectbox("분석할 MBTI 유형", options=core.MBTI_TYPES, index=0)
+        top_n = st.slider("TOP N 국가 수", 5, core.TOP_N_MAX, 10)
+
+        if selected_type not in ds.type_cols:
+            st.error("선택한 유형에 맞는 데이터 컬럼이 없습니다.")
+        else:
+            single_view(ds, selected_type, top_n)
+
+    if top_n is not None:
+        bulk_export_panel(ds, top_n)
 else:
     st.warning("CSV 데이터를 불러올 수 없습니다. 파일을 업로드하거나 같은 폴더에 넣어주세요.")
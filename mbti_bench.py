@@ -0,0 +1,199 @@
+# mbti_bench.py
+# ─────────────────────────────────────────────────────────────
+# MBTI 대시보드 파이프라인 성능 벤치마크 (헤드리스)
+#   - countriesMBTI_16types.csv 모양의 합성 데이터 생성 (%, 앞뒤 공백, 빈칸, 쉼표 섞인 국가명)
+#     파일 하나는 한 가지 스케일(퍼센트)만 쓰고, 천 단위 쉼표("12,345")는 응답자 수 표로 따로 측정
+#   - 단계별 시간 측정: 로딩 → 컬럼 탐지 → 숫자 정규화 → % 스케일 판정
+#                        → 랭킹/TOP-N → 차트 스펙 → CSV 내보내기
+#   - 결과를 JSON 기준치(baseline)와 비교해 느려졌거나 기준치에 없는 단계가 있으면 종료 코드 1
+# 사용 예:
+#   python mbti_bench.py                          # 기본 크기(200, 1만, 10만 행)
+#   python mbti_bench.py --sizes 200 1000000 --app
+#   python mbti_bench.py --app --save-baseline    # 기준치 갱신 (앱 단계 포함)
+#   python mbti_bench.py --check                  # 기준치 대비 회귀 검사
+# ─────────────────────────────────────────────────────────────
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import mbti_core as core
+
+BASELINE_FILE = "mbti_bench_baseline.json"
+DEFAULT_SIZES = [200, 10_000, 100_000]
+THRESHOLD = 1.5          # 기준치 대비 이 배수보다 느리면 회귀
+NOISE_FLOOR = 0.005      # 5ms 미만 차이는 무시 (타이머 잡음)
+APP_MAX_ROWS = 100_000   # AppTest 단계는 이 크기까지만
+
+# -----------------------------
+# 1) 합성 데이터
+# -----------------------------
+# 퍼센트 표: 열마다 표기만 다르고 스케일은 모두 0~100
+PERCENT_FORMATS = ["{:.2f}%".format, " {:.4f} ".format, "{:.4f}".format, "{:.2f}".format]
+# 응답자 수 표: 천 단위 쉼표 ("12,345")
+COUNT_FORMATS = ["{:,.0f}".format, " {:,.0f} ".format]
+
+def synthetic_cells(rng, n, formats, scale):
+    """n행 x 16유형 문자열 셀 DataFrame (열 j는 formats[j % len] 표기, 빈칸 2%)"""
+    shares = rng.dirichlet(np.ones(16), size=n) * scale
+    frame = pd.DataFrame(shares, columns=core.MBTI_TYPES)
+    for j, t in enumerate(core.MBTI_TYPES):
+        text = frame[t].map(formats[j % len(formats)])
+        text[rng.random(n) < 0.02] = ""
+        frame[t] = text
+    return frame
+
+def write_synthetic_csv(path, rows, seed=0, chunk_rows=200_000):
+    """rows행짜리 지저분한 MBTI 퍼센트 CSV를 청크 단위로 생성 (메모리 일정)."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            frame = synthetic_cells(rng, n, PERCENT_FORMATS, 100.0)
+            ids = np.arange(start, start + n)
+            frame.insert(0, "Country", [f"Region {i}, Republic of" if i % 7 == 0 else f"Country{i}" for i in ids])
+            frame.to_csv(f, index=False, header=(start == 0))
+
+# -----------------------------
+# 2) 단계별 측정
+# -----------------------------
+def timed(fn, repeat, setup=None):
+    """repeat번 실행해 가장 빠른 시간(초)과 마지막 결과 반환 (setup은 매번 측정 밖에서 실행)"""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def bench_pipeline(path, repeat):
+    """CSV 한 개에 대해 단계별 시간 dict 반환"""
+    result = {}
+    if os.path.getsize(path) > core.STREAM_THRESHOLD:
+        # 대용량은 실제 앱과 같은 스트리밍 경로만 측정
+        result["stream"], ds = timed(lambda: core.stream_topn("bench", path), 1)
+    else:
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        result["load"], table = timed(lambda: core.open_table(core.ingest_csv(raw)), repeat,
+                                      setup=lambda: shutil.rmtree(core.CACHE_DIR, ignore_errors=True))
+        columns = [str(c).strip() for c in table.column_names]
+        result["detect"], (country_idx, type_idx) = timed(lambda: core.detect_schema(columns), repeat)
+        frame = table.select(list(type_idx.values())).to_pandas()
+        result["normalize"], shares = timed(lambda: core.parse_shares(frame), repeat)
+        counts = synthetic_cells(np.random.default_rng(1), table.num_rows, COUNT_FORMATS, 100_000.0)
+        result["normalize_thousands"], _ = timed(lambda: core.parse_shares(counts), repeat)
+        result["percent"], percent_scaled = timed(lambda: core.is_fraction_scale(shares), repeat)
+        if percent_scaled:
+            shares *= 100.0
+        result["rank"], rankings = timed(lambda: core.rank_columns(shares), repeat)
+        country = table.column(country_idx).to_numpy(zero_copy_only=False)
+        ds = core.make_dataset("bench", columns, country_idx, type_idx, country, shares,
+                               rankings, percent_scaled, table.num_rows)
+
+    result["topn"], work = timed(lambda: [ds.top(t, 10) for t in ds.types], repeat)
+    core.bar_chart_spec(work[0], ds.types[0])   # Altair import는 측정에서 제외
+    result["chart_spec"], _ = timed(lambda: core.bar_chart_spec(work[0], ds.types[0]), repeat)
+    result["export_csv"], _ = timed(lambda: core.build_bulk_zip(ds, 10, "csv"), repeat)
+    return result
+
+def bench_app(repeat):
+    """Streamlit AppTest로 mbti2.py 첫 실행 / 위젯 변경 재실행 시간 측정 (현재 폴더의 CSV 사용)"""
+    from streamlit.testing.v1 import AppTest
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mbti2.py")
+    at = AppTest.from_file(app, default_timeout=600)
+    first, _ = timed(at.run, 1)
+    rerun, _ = timed(lambda: at.selectbox[0].select(core.MBTI_TYPES[-1]).run(), repeat)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {"app_first_run": first, "app_rerun": rerun}
+
+# -----------------------------
+# 3) 기준치 비교
+# -----------------------------
+def compare(results, baseline, threshold=THRESHOLD):
+    """(느려진 단계 목록, 기준치에 없는 단계 목록).
+
+    느려진 단계 = 기준치보다 threshold배 넘게(그리고 NOISE_FLOOR 이상) 느려진 (행 수, 단계, 기준, 이번).
+    기준치에 없는 단계는 비교할 수 없으므로 조용히 넘기지 않고 (행 수, 단계)로 따로 돌려준다.
+    """
+    slow, missing = [], []
+    for rows, stages in results.items():
+        for stage, sec in stages.items():
+            base = baseline.get(rows, {}).get(stage)
+            if base is None:
+                missing.append((rows, stage))
+            elif sec > base * threshold and sec - base > NOISE_FLOOR:
+                slow.append((rows, stage, base, sec))
+    return slow, missing
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MBTI 대시보드 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="행 수 목록 (200 ~ 10000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--app", action="store_true", help="Streamlit AppTest 단계도 측정")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준치로 저장")
+    parser.add_argument("--check", action="store_true", help="기준치 대비 회귀가 있으면 종료 코드 1")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    results = {}
+    home = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="mbti_bench_") as tmp:
+        os.chdir(tmp)   # 캐시 폴더·CSV를 임시 폴더에 만든다
+        try:
+            for rows in args.sizes:
+                path = "countriesMBTI_16types.csv"
+                write_synthetic_csv(path, rows)
+                stages = bench_pipeline(path, args.repeat)
+                if args.app and rows <= APP_MAX_ROWS:
+                    shutil.rmtree(core.CACHE_DIR, ignore_errors=True)
+                    stages.update(bench_app(args.repeat))
+                results[str(rows)] = stages
+                print(f"{rows:>10,}행  " + "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in stages.items()))
+        finally:
+            os.chdir(home)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"기준치 저장: {args.baseline}")
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        slow, missing = compare(results, baseline, args.threshold)
+        for rows, stage, base, sec in slow:
+            print(f"⚠️ 회귀: {rows}행 {stage} {base * 1000:.1f}ms → {sec * 1000:.1f}ms")
+        for rows, stage in missing:
+            print(f"⚠️ 기준치 없음: {rows}행 {stage} (--save-baseline으로 기준치를 다시 만드세요)")
+        if slow or missing:
+            sys.exit(1)
+        print("회귀 없음 ✅")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,813 @@
+# mbti_core.py
+# ─────────────────────────────────────────────────────────────
+# MBTI 국가별 대시보드(mbti2.py)의 데이터 파이프라인 (Streamlit 의존성 없음)
+#   로딩(CSV → Feather) → 정규화 → 유형별 랭킹 → 차트 스펙/내보내기
+# 배치 실행:
+#   python mbti_core.py countriesMBTI_16types.csv --top 10 --format json -o rankings.json
+#   python mbti_core.py countriesMBTI_16types.csv --aggregate region-weighted --format csv
+#   python mbti_core.py countriesMBTI_16types.csv --similar "South Korea" --top 5 --metric l1
+#   python mbti_core.py --snapshots snapshots/ --history INTJ --years 2019 2024 --format csv
+# ─────────────────────────────────────────────────────────────
+import argparse
+import hashlib
+import heapq
+import io
+import json
+import os
+import re
+import sys
+import threading
+import zipfile
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from pandas.api.types import union_categoricals
+
+CACHE_DIR = ".mbti_cache"   # CSV → Feather(Arrow IPC) 변환 결과 보관 폴더
+STREAM_THRESHOLD = 256 * 1024 * 1024   # 이보다 큰 CSV는 청크 스트리밍 모드로 처리
+STREAM_CHUNK_ROWS = 200_000
+TOP_N_MAX = 20   # 화면 슬라이더 최대값 = 스트리밍 모드에서 유지하는 힙 크기
+
+MBTI_TYPES = [
+    "INTJ","INTP","ENTJ","ENTP",
+    "INFJ","INFP","ENFJ","ENFP",
+    "ISTJ","ISFJ","ESTJ","ESFJ",
+    "ISTP","ISFP","ESTP","ESFP",
+]
+COUNTRY_KEYS = ["COUNTRY","NATION","국가","나라"]
+
+# -----------------------------
+# 1) 데이터 로딩
+# -----------------------------
+# CSV는 내용 해시당 딱 한 번만 파싱해서 비압축 Feather 파일로 저장하고,
+# 이후 재실행·다른 세션·다른 프로세스는 그 파일을 memory-map으로 연다.
+def cache_path(raw: bytes) -> str:
+    """CSV 바이트 → Feather 캐시 경로 (내용 해시)"""
+    return os.path.join(CACHE_DIR, f"{hashlib.sha256(raw).hexdigest()[:16]}.feather")
+
+def ingest_csv(raw: bytes) -> str:
+    """CSV 바이트를 내용 해시로 키잉된 Feather 파일로 변환하고 경로를 반환."""
+    path = cache_path(raw)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(pd.read_csv(io.BytesIO(raw)), tmp, compression="uncompressed")
+        os.replace(tmp, path)  # 동시에 변환해도 완성된 파일만 보이도록
+    return path
+
+def open_table(path):
+    """Feather 파일을 memory-map으로 연다 (복사 없음)."""
+    return feather.read_table(path, memory_map=True)
+
+def load_dataset(path):
+    """CSV 경로 → MBTIDataset. 큰 파일은 스트리밍, 나머지는 Feather 캐시 경유."""
+    stat = os.stat(path)
+    if stat.st_size > STREAM_THRESHOLD:
+        return stream_topn(f"{path}@{stat.st_mtime_ns}:{stat.st_size}", path)
+    with open(path, "rb") as f:
+        return normalize(ingest_csv(f.read()))
+
+# -----------------------------
+# 2) MBTI 컬럼 정규화
+# -----------------------------
+def canon(name):
+    """컬럼명 → 비교용 이름 ('INTJ (%)' → 'INTJ')"""
+    return str(name).upper().replace("%","").replace("(","").replace(")","").replace(" ","")
+
+def detect_schema(columns):
+    """(국가 컬럼 위치, 유형→컬럼 위치 dict) 반환. dict는 MBTI_TYPES 순서."""
+    # 국가 컬럼 자동 탐지
+    country_idx = next((i for i, c in enumerate(columns) if any(k in c.upper() for k in COUNTRY_KEYS)), 0)
+
+    # 유형별 첫 번째 매칭 컬럼
+    found = {}
+    for i, c in enumerate(columns):
+        t = canon(c)
+        if t in MBTI_TYPES and t not in found:
+            found[t] = i
+    return country_idx, {t: found[t] for t in MBTI_TYPES if t in found}
+
+def parse_shares(frame):
+    """비율 컬럼 frame → float 행렬. 문자열 셀 전체를 한 Series로 모아 한 번에 처리."""
+    shares = np.empty(frame.shape, dtype=float)
+    text = [j for j in range(frame.shape[1]) if not pd.api.types.is_numeric_dtype(frame.iloc[:, j])]
+    for j in range(frame.shape[1]):
+        if j not in text:
+            shares[:, j] = frame.iloc[:, j].to_numpy(dtype=float, na_value=np.nan)
+    if text:
+        cells = pd.Series(frame.iloc[:, text].to_numpy(dtype=object).ravel(order="F"), dtype=object)
+        cells = cells.astype(str).str.replace(r"[%,]", "", regex=True).str.strip()
+        parsed = pd.to_numeric(cells.mask(cells.isin(["", "nan", "None", "<NA>"])), errors="coerce")
+        shares[:, text] = parsed.to_numpy(dtype=float).reshape((frame.shape[0], len(text)), order="F")
+    return shares
+
+def is_fraction_scale(shares):
+    """값의 95%가 1.5 이하이면 0~1 비율로 보고 True (→ x100 필요)"""
+    finite = shares[~np.isnan(shares)]
+    return bool(finite.size and np.quantile(finite, 0.95) <= 1.5)
+
+def rank_columns(shares):
+    """유형(열)마다 NaN을 제외한 내림차순 행 순서. 값이 같으면 앞 행 우선."""
+    index = []
+    for j in range(shares.shape[1]):
+        v = shares[:, j]
+        rows = np.flatnonzero(~np.isnan(v))
+        index.append(rows[np.argsort(-v[rows], kind="stable")])
+    return index
+
+# -----------------------------
+# 3) 공유용 읽기 전용 데이터셋
+# -----------------------------
+@dataclass(frozen=True)
+class MBTIDataset:
+    """모든 세션이 참조로 공유하는 불변 데이터셋 (세션별 복사본 없음).
+
+    country는 Categorical(코드 + 고유 국가명), shares는 (행 x 유형) float32
+    열 우선 연속 행렬이며 쓰기 금지 플래그가 걸려 있다. rankings는 유형별
+    내림차순 행 번호(NaN 제외)라서 TOP-N은 앞부분 슬라이스로 끝난다.
+    """
+    version: str
+    country_col: str
+    type_cols: Mapping[str, str]     # 유형 → 원본 컬럼명
+    percent_scaled: bool
+    types: tuple                     # shares 열 순서
+    country: pd.Categorical
+    shares: np.ndarray
+    rankings: Mapping[str, np.ndarray]
+    rows: int                        # 원본 CSV 행 수
+    streamed: bool = False
+
+    def top(self, mbti_type, n):
+        """(국가, 비율) TOP-n 프레임. 선택한 n개 행만 꺼낸다."""
+        rows = self.rankings[mbti_type][:n]
+        return pd.DataFrame({
+            "Country": self.country.take(rows).remove_unused_categories(),
+            "Share(%)": self.shares[rows, self.types.index(mbti_type)],
+        })
+
+    def top_all(self, n):
+        """모든 유형의 TOP-n을 한 번에 모은 롱 포맷 프레임 (Type, Rank, Country, Share(%)).
+
+        유형별 랭킹 앞부분을 (n x 유형) 행 번호 행렬로 쌓은 뒤, 국가·비율은
+        한 번의 팬시 인덱싱으로 꺼낸다. 값이 n개보다 적은 유형은 빈칸.
+        """
+        rows = np.full((n, len(self.types)), -1, dtype=np.intp)
+        for j, t in enumerate(self.types):
+            head = self.rankings[t][:n]
+            rows[:len(head), j] = head
+        rank, col = np.nonzero(rows >= 0)
+        picked = rows[rank, col]
+        return pd.DataFrame({
+            "Type": pd.Categorical.from_codes(col, self.types),
+            "Rank": (rank + 1).astype(np.int16),
+            "Country": self.country.take(picked).remove_unused_categories(),
+            "Share(%)": self.shares[picked, col],
+        })
+
+def make_dataset(version, columns, country_idx, type_idx, country, shares, rankings,
+                 percent_scaled, rows, streamed=False):
+    shares = np.asfortranarray(shares, dtype=np.float32)
+    shares.setflags(write=False)
+    for order in rankings:
+        order.setflags(write=False)
+    types = tuple(type_idx)
+    return MBTIDataset(
+        version=version,
+        country_col=columns[country_idx],
+        type_cols=MappingProxyType({t: columns[type_idx[t]] for t in types}),
+        percent_scaled=percent_scaled,
+        types=types,
+        country=pd.Categorical(country),
+        shares=shares,
+        rankings=MappingProxyType(dict(zip(types, rankings))),
+        rows=rows,
+        streamed=streamed,
+    )
+
+def normalize(version):
+    """Feather 경로(= 데이터셋 버전) → MBTIDataset. 스키마 탐지 + 비율 변환 + 랭킹."""
+    raw = open_table(version)
+    columns = [str(c).strip() for c in raw.column_names]
+    country_idx, type_idx = detect_schema(columns)
+    shares = parse_shares(raw.select(list(type_idx.values())).to_pandas())
+
+    # % 처리: 0~1 비율이면 x100
+    percent_scaled = is_fraction_scale(shares)
+    if percent_scaled:
+        shares *= 100.0
+
+    # 랭킹은 float32로 줄이기 전 값으로 계산
+    return make_dataset(
+        version, columns, country_idx, type_idx,
+        raw.column(country_idx).to_numpy(zero_copy_only=False),
+        shares, rank_columns(shares), percent_scaled, raw.num_rows,
+    )
+
+# -----------------------------
+# 4) 대용량 CSV 스트리밍 모드
+# -----------------------------
+# 파일 전체를 DataFrame으로 올리지 않고 청크 단위로 읽으면서
+# 유형별 TOP_N_MAX 최소 힙만 유지한다. 메모리는 청크 크기에만 비례.
+def stream_topn(version, src, chunk_rows=STREAM_CHUNK_ROWS, keep=TOP_N_MAX):
+    """CSV(경로 또는 파일 객체)를 청크로 읽어 MBTIDataset을 만든다.
+
+    country/shares에는 어떤 유형의 TOP keep에 든 행만 남는다.
+    """
+    columns = [str(c).strip() for c in pd.read_csv(src, nrows=0).columns]
+    if hasattr(src, "seek"):
+        src.seek(0)
+    country_idx, type_idx = detect_schema(columns)
+    types = list(type_idx)
+    heaps = {t: [] for t in types}   # (값, -행번호, 국가): 값이 같으면 앞 행 우선
+    over = total = 0                 # % 스케일 판정용: 1.5 초과 값 개수 / 유한 값 개수
+    offset = 0
+
+    reader = pd.read_csv(src, usecols=[country_idx] + list(type_idx.values()), chunksize=chunk_rows)
+    for chunk in reader:
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        country = chunk[columns[country_idx]].to_numpy()
+        shares = parse_shares(chunk[[columns[type_idx[t]] for t in types]])
+        finite = ~np.isnan(shares)
+        total += int(finite.sum())
+        over += int((shares[finite] > 1.5).sum())
+
+        for j, t in enumerate(types):
+            v = shares[:, j]
+            rows = np.flatnonzero(~np.isnan(v))
+            if len(rows) > keep:
+                rows = rows[np.argpartition(-v[rows], keep - 1)[:keep]]
+            heap = heaps[t]
+            for r in rows:
+                item = (v[r], -(offset + r), country[r])
+                if len(heap) < keep:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        offset += len(chunk)
+
+    # 0.95 분위수 <= 1.5  ⇔  1.5 초과 값이 5% 이하 (값 전체를 보관하지 않고 판정)
+    percent_scaled = bool(total and over <= 0.05 * total)
+    scale = 100.0 if percent_scaled else 1.0
+
+    # 힙에 남은 행만 모아 작은 행렬로 재구성
+    kept = sorted({-item[1] for heap in heaps.values() for item in heap})
+    pos = {r: i for i, r in enumerate(kept)}
+    country = np.empty(len(kept), dtype=object)
+    shares = np.full((len(kept), len(types)), np.nan)
+    rankings = []
+    for j, t in enumerate(types):
+        ranked = sorted(heaps[t], reverse=True)
+        for value, neg_row, name in ranked:
+            country[pos[-neg_row]] = name
+            shares[pos[-neg_row], j] = value * scale
+        rankings.append(np.array([pos[-neg_row] for _, neg_row, _ in ranked], dtype=np.intp))
+
+    return make_dataset(version, columns, country_idx, type_idx, country, shares, rankings,
+                        percent_scaled, offset, streamed=True)
+
+# -----------------------------
+# 4-1) 디스크 CSV 감시 (끝에 추가된 행만 증분 반영)
+# -----------------------------
+PROBE_BYTES = 256   # 덮어쓰기 판별용으로 기억해 두는 파싱 끝 지점 직전 바이트 수
+
+def merge_ranking(order, values, new_values, start):
+    """기존 내림차순 행 순서 order에 새 행(번호 start부터)을 병합.
+
+    새 행만 정렬한 뒤 두 정렬된 구간을 이어 붙여 stable 정렬(timsort가
+    두 run을 선형 병합)하므로 전체 재정렬보다 훨씬 싸다. 값이 같으면 기존 행 우선.
+    """
+    rows = np.flatnonzero(~np.isnan(new_values))
+    rows = rows[np.argsort(-new_values[rows], kind="stable")]
+    keys = np.concatenate([-values[order], -new_values[rows]])
+    merged = np.concatenate([order, rows + start])
+    return merged[np.argsort(keys, kind="stable")]
+
+def append_rows(ds, version, country, shares):
+    """ds 뒤에 정규화된 새 행을 붙인 새 MBTIDataset (ds 자체는 그대로)"""
+    shares = np.asarray(shares, dtype=np.float32)
+    merged = np.asfortranarray(np.concatenate([ds.shares, shares]))
+    merged.setflags(write=False)
+    rankings = {}
+    for j, t in enumerate(ds.types):
+        order = merge_ranking(ds.rankings[t], ds.shares[:, j], shares[:, j], ds.rows)
+        order.setflags(write=False)
+        rankings[t] = order
+    return replace(
+        ds,
+        version=version,
+        country=union_categoricals([ds.country, pd.Categorical(country)]),
+        shares=merged,
+        rankings=MappingProxyType(rankings),
+        rows=ds.rows + len(shares),
+    )
+
+class WatchedCSV:
+    """(mtime, size)로 변경을 감지하는 CSV 데이터 소스.
+
+    파일 끝에 행만 추가됐으면 새 꼬리 부분만 파싱해서 기존 데이터셋에 병합하고,
+    중간이 바뀌었거나 잘렸으면 Feather 캐시 경유로 전체를 다시 만든다.
+    여러 세션이 동시에 refresh()해도 파싱은 한 번만 일어난다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dataset = None
+        self._lock = threading.Lock()
+        self._stat = None      # 마지막으로 반영한 (mtime_ns, size)
+        self._offset = 0       # 파싱을 마친 바이트 위치 (완성된 줄의 끝)
+        self._probe = b""      # _offset 직전 PROBE_BYTES 바이트
+        self._usecols = None   # 꼬리 파싱용 (국가 위치, 유형 위치...)
+        self._base = None      # 마지막 전체 재구성 때의 데이터셋 버전
+        self._feather = None   # 이 감시자가 만든 Feather 캐시 (다음 재구성 때 지움)
+
+    def refresh(self):
+        """최신 MBTIDataset 반환. 바뀐 게 없으면 stat 한 번으로 끝난다."""
+        stat = os.stat(self.path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._stat:
+            return self.dataset
+        with self._lock:
+            if key != self._stat:
+                if not (self.dataset is not None and self._append(stat.st_size)):
+                    self._rebuild()
+                self._stat = key
+        return self.dataset
+
+    def _rebuild(self):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        path = cache_path(raw)
+        created = not os.path.exists(path)   # 업로드 등 다른 곳이 만든 파일은 건드리지 않는다
+        ds = normalize(ingest_csv(raw))
+        if self._feather and self._feather != path:
+            try:
+                os.remove(self._feather)   # 열려 있는 memory-map은 그대로 유효 (POSIX)
+            except OSError:
+                pass                       # Windows에서 아직 열려 있으면 남겨 둔다
+        self._feather = path if created else None
+        columns = [str(c).strip() for c in pd.read_csv(io.BytesIO(raw), nrows=0).columns]
+        country_idx, type_idx = detect_schema(columns)
+        self._usecols = [country_idx] + list(type_idx.values())
+        self._base = ds.version
+        self.dataset = replace(ds, version=f"{self._base}#{len(raw)}")
+        self._offset = len(raw)
+        self._probe = raw[-PROBE_BYTES:]
+
+    def _append(self, size):
+        """꼬리만 추가된 경우 증분 반영하고 True, 아니면 False (→ 전체 재구성)"""
+        if size < self._offset or not self._probe.endswith(b"\n"):
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self._offset - len(self._probe))
+            if f.read(len(self._probe)) != self._probe:
+                return False
+            tail = f.read(size - self._offset)
+        end = tail.rfind(b"\n") + 1   # 아직 쓰는 중인 마지막 줄은 다음 번에
+        if end == 0:
+            return True
+        tail = tail[:end]
+
+        try:
+            # 필드가 너무 많은 줄은 건너뛰고, 꼬리 전체가 짧은 줄뿐이라 열을 못 맞추면
+            # 전체 재구성으로 (짧은 줄은 전체 파싱에서 빈칸으로 채워진다)
+            frame = pd.read_csv(io.BytesIO(tail), header=None, usecols=self._usecols, on_bad_lines="skip")
+        except (ValueError, pd.errors.ParserError):
+            return False
+        frame = frame[self._usecols]
+        shares = parse_shares(frame.iloc[:, 1:])
+        if self.dataset.percent_scaled:
+            shares *= 100.0
+        self._offset += end
+        self._probe = (self._probe + tail)[-PROBE_BYTES:]
+        # 국가 칸이 숫자·빈칸인 잘못된 줄도 있어서 기존 범주와 같은 문자열로 맞춘다
+        country = frame.iloc[:, 0]
+        country = country.astype(str).where(country.notna()).to_numpy(dtype=object)
+        self.dataset = append_rows(self.dataset, f"{self._base}#{self._offset}", country, shares)
+        return True
+
+# -----------------------------
+# 4-2) 대륙·성향축 집계
+# -----------------------------
+REGION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "country_regions.csv")
+AXES = ["E", "I", "N", "S", "T", "F", "J", "P"]   # (E,I) (N,S) (T,F) (J,P) 순서
+COUNTRY_ALIASES = {
+    "usa": "united states", "us": "united states", "united states of america": "united states",
+    "uk": "united kingdom", "great britain": "united kingdom",
+    "korea, republic of": "south korea", "republic of korea": "south korea", "korea": "south korea",
+    "korea, south": "south korea", "대한민국": "south korea", "한국": "south korea",
+    "russian federation": "russia", "türkiye": "turkey", "turkiye": "turkey",
+    "viet nam": "vietnam", "iran, islamic republic of": "iran", "côte d'ivoire": "ivory coast",
+    "cote d'ivoire": "ivory coast", "burma": "myanmar", "swaziland": "eswatini",
+    "macedonia": "north macedonia", "cabo verde": "cape verde", "dr congo": "democratic republic of the congo",
+    "republic of the congo": "congo", "east timor": "timor-leste", "holy see": "vatican city",
+}
+
+def country_key(name):
+    """국가명 → 조인용 키 (소문자, 공백 정리, 별칭 통일)"""
+    key = " ".join(str(name).casefold().split())
+    return COUNTRY_ALIASES.get(key, key)
+
+def load_regions(path=REGION_FILE):
+    """앱과 함께 배포되는 국가 → (Region, Population(M)) 표. 키는 country_key()."""
+    regions = pd.read_csv(path)
+    regions.index = regions["Country"].map(country_key)
+    return regions[~regions.index.duplicated()]
+
+def axis_totals(ds):
+    """국가별 성향축 합계 (행 x 8): 예) E = E로 시작하는 8개 유형 비율의 합.
+
+    16개 유형 열 → 8개 축을 0/1 행렬 하나로 곱해 한 번에 계산 (NaN은 0으로).
+    """
+    # 유형이 하나도 없으면 (0,)이 아니라 (0 x 8) 행렬 → 결과는 전부 0
+    letters = np.array([[axis in t for axis in AXES] for t in ds.types], dtype=np.float32).reshape(len(ds.types), len(AXES))
+    return np.nan_to_num(ds.shares) @ letters
+
+def region_summary(ds, regions, weighted=False):
+    """대륙별 집계 프레임. 열: Countries, Population(M), 16개 유형, 8개 성향축.
+
+    weighted=False면 국가 단순 평균, True면 인구 가중 평균(값이 있는 국가만 가중치 합산).
+    표에 없는 국가는 Region "Unknown"으로 모은다.
+    """
+    if ds.streamed:
+        raise ValueError("스트리밍 모드 데이터셋은 TOP-N 행만 남아 있어 집계할 수 없습니다.")
+    # 고유 국가명만 매핑한 뒤 코드로 펼친다 (행마다 문자열 처리 없음)
+    keys = [country_key(c) for c in ds.country.categories]
+    region_of = regions["Region"].reindex(keys).fillna("Unknown").to_numpy()
+    pop_of = regions["Population(M)"].reindex(keys).to_numpy(dtype=float)
+    codes = ds.country.codes
+    region = np.where(codes >= 0, region_of[codes], "Unknown")
+    pop = np.where(codes >= 0, pop_of[codes], np.nan)
+
+    values = pd.DataFrame(np.column_stack([ds.shares, axis_totals(ds)]), columns=list(ds.types) + AXES)
+    groups = pd.Series(region, name="Region")
+    if weighted:
+        w = pd.Series(pop).fillna(0.0)
+        num = values.mul(w, axis=0).groupby(groups).sum(min_count=1)
+        den = values.notna().mul(w, axis=0).groupby(groups).sum()
+        stats = num / den.where(den > 0)
+    else:
+        stats = values.groupby(groups).mean()
+    stats.insert(0, "Population(M)", pd.Series(pop).groupby(groups).sum())
+    stats.insert(0, "Countries", groups.value_counts())
+    return stats.sort_index()
+
+# -----------------------------
+# 4-3) 유형 비율 프로필 유사도 검색
+# -----------------------------
+class SimilarityIndex:
+    """국가(행)별 16차원 비율 벡터의 k-최근접 검색 인덱스.
+
+    데이터셋 버전당 한 번, NaN을 0으로 채운 float32 행렬을 두 가지로 정규화해 둔다.
+      - cosine: 길이 1로 정규화 → 질의 = 행렬-벡터 곱 한 번
+      - l1:     합 1로 정규화(분포) → 질의 = 블록 단위 |X - q| 합
+    상위 k개는 argpartition으로 고른 뒤 k개만 정렬한다.
+    """
+    BLOCK_ROWS = 8_192   # L1 계산 블록 (임시 행렬이 CPU 캐시에 들어가는 크기)
+
+    def __init__(self, ds):
+        if ds.streamed:
+            raise ValueError("스트리밍 모드 데이터셋은 TOP-N 행만 남아 있어 유사도 검색을 할 수 없습니다.")
+        profiles = np.ascontiguousarray(np.nan_to_num(ds.shares), dtype=np.float32)
+        norm = np.linalg.norm(profiles, axis=1, keepdims=True)
+        total = profiles.sum(axis=1, keepdims=True)
+        self.unit = np.divide(profiles, norm, out=np.zeros_like(profiles), where=norm > 0)
+        self.dist = np.divide(profiles, total, out=np.zeros_like(profiles), where=total > 0)
+        self.country = ds.country
+        # 국가명 → 첫 번째 행 번호
+        codes = ds.country.codes
+        first = np.full(len(ds.country.categories), -1, dtype=np.intp)
+        seen = codes >= 0
+        first[codes[seen][::-1]] = np.flatnonzero(seen)[::-1]
+        self._first_row = first
+
+    def row_of(self, country):
+        """국가명의 (첫) 행 번호. 없으면 KeyError."""
+        code = self.country.categories.get_loc(country)
+        return int(self._first_row[code])
+
+    def query(self, row, k=10, metric="cosine"):
+        """row와 가장 비슷한 k개 행 (자기 자신 제외) → (행 번호 배열, 점수 배열).
+
+        cosine은 유사도(클수록 비슷), l1은 분포 간 거리(%p 합, 작을수록 비슷).
+        """
+        if metric == "cosine":
+            score = -(self.unit @ self.unit[row])
+        elif metric == "l1":
+            q = self.dist[row]
+            score = np.empty(len(self.dist), dtype=np.float32)
+            for start in range(0, len(self.dist), self.BLOCK_ROWS):
+                block = self.dist[start:start + self.BLOCK_ROWS]
+                score[start:start + len(block)] = np.abs(block - q).sum(axis=1)
+        else:
+            raise ValueError(f"지원하지 않는 거리: {metric}")
+        score[row] = np.inf
+        k = min(k, len(score) - 1)
+        if k <= 0:
+            return np.array([], dtype=np.intp), np.array([], dtype=np.float32)
+        top = np.argpartition(score, k - 1)[:k]
+        top = top[np.argsort(score[top], kind="stable")]
+        value = -score[top] if metric == "cosine" else score[top] * 100.0
+        return top, value
+
+    def frame(self, rows, value, metric="cosine"):
+        """query() 결과 → (Country, Similarity 또는 L1 distance(%p)) 프레임"""
+        label = "Similarity" if metric == "cosine" else "L1 distance(%p)"
+        return pd.DataFrame({"Country": self.country.take(rows).remove_unused_categories(), label: value})
+
+    def similar(self, country, k=10, metric="cosine"):
+        """국가명 기준 k-최근접 프레임 (Country, Similarity 또는 L1 distance(%p))"""
+        return self.frame(*self.query(self.row_of(country), k, metric), metric)
+
+# -----------------------------
+# 4-4) 연도별 스냅숏 (파티션 열 지향 저장소)
+# -----------------------------
+SNAPSHOT_DIR = "snapshots"   # countriesMBTI_16types_2021.csv 처럼 파일명에 연도가 든 CSV 폴더
+
+def snapshot_year(path):
+    """파일명 속 4자리 연도(1900~2099) → int, 없으면 None"""
+    m = re.search(r"(?<!\d)((?:19|20)\d{2})(?!\d)", os.path.basename(path))
+    return int(m.group(1)) if m else None
+
+class SnapshotStore:
+    """연도별 스냅숏을 year=YYYY/part-<내용 해시>.feather 로 보관하는 저장소.
+
+    각 파티션은 정규화가 끝난 Country + 유형별 float32 열만 가진 비압축 Feather라
+    질의는 필요한 연도 폴더만 열고, 그 안에서도 필요한 열만 memory-map으로 읽는다.
+    """
+
+    def __init__(self, root=os.path.join(CACHE_DIR, "snapshots")):
+        self.root = root
+
+    def _part(self, year):
+        folder = os.path.join(self.root, f"year={year}")
+        parts = sorted(f for f in os.listdir(folder) if f.endswith(".feather")) if os.path.isdir(folder) else []
+        return os.path.join(folder, parts[-1]) if parts else None
+
+    def add(self, year, raw: bytes):
+        """CSV 바이트를 year 파티션으로 저장 (같은 내용이면 건너뜀). 파티션 경로 반환."""
+        folder = os.path.join(self.root, f"year={year}")
+        path = os.path.join(folder, f"part-{hashlib.sha256(raw).hexdigest()[:16]}.feather")
+        if os.path.exists(path):
+            return path
+        ds = normalize(ingest_csv(raw))
+        frame = pd.DataFrame(ds.shares, columns=list(ds.types))
+        frame.insert(0, "Country", ds.country)
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(frame, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+        for old in os.listdir(folder):   # 같은 연도의 이전 내용은 교체
+            if old.endswith(".feather") and os.path.join(folder, old) != path:
+                os.remove(os.path.join(folder, old))
+        return path
+
+    def years(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(d[5:]) for d in os.listdir(self.root)
+                      if d.startswith("year=") and d[5:].isdigit() and self._part(int(d[5:])))
+
+    def read(self, columns, years=None):
+        """(Year, Country, *columns) 프레임. 요청한 연도 파티션과 열만 읽는다."""
+        frames = []
+        for year in self.years() if years is None else years:
+            path = self._part(year)
+            if path is None:
+                continue
+            table = feather.read_table(path, memory_map=True)   # memory-map이라 안 쓰는 열은 읽히지 않음
+            present = [c for c in columns if c in table.column_names]
+            frame = table.select(["Country"] + present).to_pandas()
+            frame = frame.reindex(columns=["Country"] + list(columns))
+            frame.insert(0, "Year", np.int16(year))
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["Year", "Country"] + list(columns))
+        return pd.concat(frames, ignore_index=True)
+
+    def rank_history(self, mbti_type, years=None, top_n=10):
+        """한 유형의 연도별 국가 순위 (Year, Country, Rank, Share(%)).
+
+        범위 안 어느 해든 TOP-N에 들었던 국가만 남기고, 그 국가들의 모든 연도
+        순위를 함께 돌려준다 (순위 변화 추적용).
+        """
+        frame = self.read([mbti_type], years).dropna(subset=[mbti_type])
+        frame = frame.rename(columns={mbti_type: "Share(%)"})
+        frame["Rank"] = frame.groupby("Year")["Share(%)"].rank(ascending=False, method="first").astype(np.int32)
+        keep = frame.loc[frame["Rank"] <= top_n, "Country"].unique()
+        out = frame[frame["Country"].isin(keep)]
+        return out[["Year", "Country", "Rank", "Share(%)"]].sort_values(["Year", "Rank"], ignore_index=True)
+
+def sync_snapshots(store, folder=SNAPSHOT_DIR):
+    """폴더 안 연도 CSV를 모두 저장소에 반영. 반영된 연도 목록 반환."""
+    years = []
+    for name in sorted(os.listdir(folder)):
+        year = snapshot_year(name)
+        if year is None or not name.lower().endswith(".csv"):
+            continue
+        with open(os.path.join(folder, name), "rb") as f:
+            store.add(year, f.read())
+        years.append(year)
+    return years
+
+# -----------------------------
+# 5) 차트 스펙 (Altair는 여기서만 지연 import)
+# -----------------------------
+# 스펙에는 데이터를 넣지 않는다. 데이터는 화면 쪽에서 DataFrame으로 따로
+# 넘겨 Arrow(float32 + 사전 인코딩 문자열)로 보낸다.
+def spec_without_data(chart):
+    """빈 프레임으로 만든 차트의 스펙에서 데이터 부분만 제거"""
+    spec = chart.to_dict()
+    spec.pop("data", None)
+    spec.pop("datasets", None)
+    return spec
+
+def bar_chart_spec(work, selected_type):
+    """유형별 TOP-N 막대그래프 Vega-Lite 스펙 (데이터 제외)"""
+    import altair as alt
+
+    highlight = alt.selection_point(on="mouseover", fields=["Country"], nearest=True, empty=False)
+
+    base = alt.Chart(work.iloc[:0]).encode(
+        x=alt.X("Share(%):Q", title="Share (%)", scale=alt.Scale(domain=[0, float(work["Share(%)"].max()) * 1.1])),
+        y=alt.Y("Country:N", sort='-x', title=None),
+        tooltip=["Country:N", alt.Tooltip("Share(%):Q", format=".2f")]
+    )
+
+    bars = base.mark_bar().encode(
+        color=alt.condition(highlight, alt.value("#1f77b4"), alt.value("#a6bddb"))
+    ).add_params(highlight)
+
+    text = base.mark_text(align="left", dx=4).encode(
+        text=alt.Text("Share(%):Q", format=".2f")
+    )
+
+    chart = (bars + text).properties(
+        height=40 * len(work) + 10,
+        title=f"{selected_type} 비율이 높은 국가 TOP {len(work)}"
+    ).interactive()
+    return spec_without_data(chart)
+
+def heatmap_spec(grid, types, top_n):
+    """(순위 x 유형) 히트맵 Vega-Lite 스펙 (데이터 제외)"""
+    import altair as alt
+
+    heat = alt.Chart(grid.iloc[:0]).encode(
+        x=alt.X("Type:N", sort=list(types), title=None, axis=alt.Axis(orient="top", labelAngle=0)),
+        y=alt.Y("Rank:O", title="순위"),
+    )
+    cells = heat.mark_rect().encode(
+        color=alt.Color("Share(%):Q", title="Share (%)", scale=alt.Scale(scheme="blues")),
+        tooltip=["Type:N", "Rank:O", "Country:N", alt.Tooltip("Share(%):Q", format=".2f")],
+    )
+    labels = heat.mark_text(fontSize=10).encode(
+        text="Country:N",
+        color=alt.condition(alt.datum["Share(%)"] > float(grid["Share(%)"].median()), alt.value("white"), alt.value("black")),
+    )
+    return spec_without_data((cells + labels).properties(height=28 * top_n + 40))
+
+def region_bar_spec(long, title):
+    """대륙별 막대그래프 스펙 (데이터 제외). long: Region, Series, Value 열.
+
+    Series가 여러 개(예: E/I)면 대륙마다 누적 막대로 그린다.
+    """
+    import altair as alt
+
+    chart = alt.Chart(long.iloc[:0]).mark_bar().encode(
+        x=alt.X("Value:Q", title="Share (%)", stack="zero"),
+        y=alt.Y("Region:N", sort="-x", title=None),
+        color=alt.Color("Series:N", title=None),
+        tooltip=["Region:N", "Series:N", alt.Tooltip("Value:Q", format=".2f")],
+    )
+    return spec_without_data(chart.properties(height=40 * long["Region"].nunique() + 10, title=title))
+
+def profile_spec(long, types):
+    """국가별 16개 유형 비율 비교 막대그래프 스펙 (데이터 제외). long: Country, Type, Share(%)"""
+    import altair as alt
+
+    chart = alt.Chart(long.iloc[:0]).mark_bar().encode(
+        x=alt.X("Type:N", sort=list(types), title=None),
+        xOffset=alt.XOffset("Country:N"),
+        y=alt.Y("Share(%):Q", title="Share (%)"),
+        color=alt.Color("Country:N", title=None),
+        tooltip=["Country:N", "Type:N", alt.Tooltip("Share(%):Q", format=".2f")],
+    )
+    return spec_without_data(chart.properties(height=320))
+
+def history_spec(long, mbti_type, top_n):
+    """연도별 순위 변화(범프 차트) 스펙 (데이터 제외). long: Year, Country, Rank, Share(%)"""
+    import altair as alt
+
+    base = alt.Chart(long.iloc[:0]).encode(
+        x=alt.X("Year:O", title=None),
+        y=alt.Y("Rank:Q", title="순위", scale=alt.Scale(reverse=True, domainMin=1, nice=False)),
+        color=alt.Color("Country:N", title=None),
+        tooltip=["Year:O", "Country:N", "Rank:Q", alt.Tooltip("Share(%):Q", format=".2f")],
+    )
+    chart = base.mark_line(point=True) + base.mark_text(align="left", dx=6).encode(text="Country:N").transform_filter(
+        alt.datum.Year == int(long["Year"].max()) if len(long) else alt.datum.Year == 0
+    )
+    return spec_without_data(chart.properties(height=34 * top_n + 40, title=f"{mbti_type} 국가 순위 변화"))
+
+# -----------------------------
+# 6) 내보내기
+# -----------------------------
+def top_csv(ds, selected_type, top_n):
+    """유형별 TOP-N CSV 바이트"""
+    return ds.top(selected_type, top_n).to_csv(index=False).encode("utf-8")
+
+def build_bulk_zip(ds, top_n, fmt):
+    """16개 유형 TOP-N을 유형별 CSV/Parquet 파일로 담은 ZIP 바이트"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for t in ds.types:
+            name = f"top_{top_n}_{t}.{fmt}"
+            if fmt == "csv":
+                zf.writestr(name, top_csv(ds, t, top_n))
+            else:
+                out = io.BytesIO()
+                ds.top(t, top_n).to_parquet(out, index=False)
+                zf.writestr(name, out.getvalue())
+    return buf.getvalue()
+
+# -----------------------------
+# 7) 배치 CLI
+# -----------------------------
+def rankings_json(ds, top_n):
+    """{유형: [{"Country", "Share(%)"}, ...]} 형태의 dict (비율은 소수 4자리)"""
+    out = {}
+    for t in ds.types:
+        work = ds.top(t, top_n)
+        out[t] = [{"Country": str(c), "Share(%)": round(float(v), 4)}
+                  for c, v in zip(work["Country"], work["Share(%)"])]
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MBTI 유형별 국가 TOP-N 랭킹을 한 번에 계산해 저장")
+    parser.add_argument("csv", nargs="?", help="국가별 MBTI 비율 CSV 경로")
+    parser.add_argument("--top", type=int, default=10, help="유형별 국가 수 (기본 10)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--aggregate", choices=["region", "region-weighted", "axis"],
+                        help="TOP-N 대신 대륙별 평균/인구 가중 평균 또는 국가별 성향축 합계를 출력")
+    parser.add_argument("--similar", metavar="COUNTRY", help="이 국가와 유형 분포가 가장 비슷한 국가 출력")
+    parser.add_argument("--metric", choices=["cosine", "l1"], default="cosine", help="--similar 거리 (기본 cosine)")
+    parser.add_argument("--snapshots", metavar="DIR", help="연도별 CSV 폴더 (파일명에 연도 포함)")
+    parser.add_argument("--history", metavar="TYPE", help="--snapshots의 연도별 TOP-N 순위 변화 출력")
+    parser.add_argument("--years", type=int, nargs=2, metavar=("FROM", "TO"), help="--history 연도 범위")
+    parser.add_argument("-o", "--output", help="저장 경로 (생략하면 표준 출력)")
+    args = parser.parse_args(argv)
+
+    if args.history:
+        if not args.snapshots:
+            parser.error("--history에는 --snapshots 폴더가 필요합니다.")
+        store = SnapshotStore()
+        sync_snapshots(store, args.snapshots)
+        years = [y for y in store.years() if not args.years or args.years[0] <= y <= args.years[1]]
+        table = store.rank_history(args.history.upper(), years, args.top)
+        if args.format == "json":
+            text = table.to_json(orient="records", force_ascii=False, indent=2, double_precision=4)
+        else:
+            text = table.to_csv(index=False)
+        write_output(text, args.output)
+        return
+    if not args.csv:
+        parser.error("CSV 경로가 필요합니다.")
+
+    ds = load_dataset(args.csv)
+    if ds.streamed and (args.top > TOP_N_MAX or args.aggregate or args.similar):
+        parser.error(f"스트리밍 모드에서는 --top {TOP_N_MAX} 이하의 랭킹만 지원합니다.")
+
+    if args.similar or args.aggregate:
+        if args.similar:
+            try:
+                table = SimilarityIndex(ds).similar(args.similar, args.top, args.metric)
+            except KeyError:
+                parser.error(f"데이터에 없는 국가입니다: {args.similar}")
+        elif args.aggregate == "axis":
+            table = pd.DataFrame(axis_totals(ds), columns=AXES)
+            table.insert(0, "Country", ds.country)
+        else:
+            table = region_summary(ds, load_regions(), weighted=args.aggregate == "region-weighted").reset_index()
+        if args.format == "json":
+            text = table.to_json(orient="records", force_ascii=False, indent=2, double_precision=4)
+        else:
+            text = table.to_csv(index=False)
+    elif args.format == "json":
+        text = json.dumps(rankings_json(ds, args.top), ensure_ascii=False, indent=2)
+    else:
+        text = ds.top_all(args.top).sort_values(["Type", "Rank"], kind="stable").to_csv(index=False)
+
+    write_output(text, args.output)
+
+def write_output(text, path):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# river_engine.py
+# ─────────────────────────────────────────────────────────────
+# 강 건너기 퍼즐(vetagame_001.py) 규칙 엔진 (Streamlit 의존성 없음)
+#   상태 = 6비트 정수 (0~63)
+#     bit 0~3 : 사람·늑대·양·양배추 위치 (0 = 왼쪽 둑, 1 = 오른쪽 둑)
+#     bit 4~5 : 보트 탑승객 (0 = 없음, 1 = 늑대, 2 = 양, 3 = 양배추)
+#   보트는 항상 사람과 같은 둑에 있으므로 따로 저장하지 않는다.
+#   전이표(TRANSITION)와 판정표(STATUS)를 import 때 한 번 만들어 두고
+#   이동 검사·승패 판정은 표 조회 한 번으로 끝낸다.
+# ─────────────────────────────────────────────────────────────
+ITEMS = ["person", "wolf", "goat", "cabbage"]
+BIT = {name: 1 << i for i, name in enumerate(ITEMS)}
+LOAD_SHIFT = 4
+N_STATES = 1 << 6
+
+# 행동: 0 = 보트 이동, 1~3 = 늑대/양/양배추 태우기·내리기
+MOVE = 0
+ACTIONS = ["move", "wolf", "goat", "cabbage"]
+ACTION_OF = {name: i for i, name in enumerate(ACTIONS)}
+
+# 판정
+PLAYING, WOLF_ATE_GOAT, GOAT_ATE_CABBAGE, WON = range(4)
+MESSAGES = {
+    WOLF_ATE_GOAT: "늑대가 양을 먹어버렸어요! 🐺➡️🐑",
+    GOAT_ATE_CABBAGE: "양이 양배추를 먹어버렸어요! 🐑➡️🥬",
+    WON: "모두 무사히 건넜습니다! 🎉",
+}
+
+START = 0
+
+# -----------------------------
+# 1) 상태 인코딩
+# -----------------------------
+def side(state, name):
+    """'L' 또는 'R'"""
+    return "R" if state & BIT[name] else "L"
+
+def boat_side(state):
+    return side(state, "person")
+
+def load(state):
+    """보트 탑승객 이름 (없으면 None)"""
+    code = state >> LOAD_SHIFT
+    return ACTIONS[code] if code else None
+
+def encode(positions, boat_load=None):
+    """{'person': 'L', ...} + 탑승객 → 상태 정수"""
+    state = sum(BIT[n] for n in ITEMS if positions[n] == "R")
+    return state | (ACTION_OF[boat_load] << LOAD_SHIFT if boat_load else 0)
+
+def positions(state):
+    return {n: side(state, n) for n in ITEMS}
+
+# -----------------------------
+# 2) 표 (import 때 한 번)
+# -----------------------------
+def _status(state):
+    bank = state & 0b1111
+    for s in (0, 0b1111):          # 각 둑: 해당 둑에 있는 객체 비트
+        here = ~(bank ^ s) & 0b1111
+        if here & BIT["person"]:
+            continue
+        if here & BIT["wolf"] and here & BIT["goat"]:
+            return WOLF_ATE_GOAT
+        if here & BIT["goat"] and here & BIT["cabbage"]:
+            return GOAT_ATE_CABBAGE
+    return WON if bank == 0b1111 else PLAYING
+
+def _transition(state, action):
+    """다음 상태, 불가능하면 -1. 끝난 판(승/패)에서는 어떤 행동도 불가."""
+    if STATUS[state] != PLAYING:
+        return -1
+    cargo = state >> LOAD_SHIFT
+    person = state & BIT["person"]
+    if action == MOVE:
+        flip = BIT["person"] | (1 << cargo if cargo else 0)
+        return (state ^ flip) & 0b1111          # 도착하면 자동 하선
+    name = ACTIONS[action]
+    if bool(state & BIT[name]) != bool(person):  # 보트(=사람)와 같은 둑에 있어야
+        return -1
+    if cargo == action:
+        return state & 0b1111                    # 내리기
+    if cargo:
+        return -1                                # 자리는 하나
+    return state | action << LOAD_SHIFT          # 태우기
+
+STATUS = bytes(_status(s) for s in range(N_STATES))
+TRANSITION = [[_transition(s, a) for a in range(len(ACTIONS))] for s in range(N_STATES)]
+
+def step(state, action):
+    """표 조회 한 번: 다음 상태 또는 -1"""
+    return TRANSITION[state][action]
+
+def can_board(state, name):
+    return TRANSITION[state][ACTION_OF[name]] != -1
+
+# -----------------------------
+# 3) 게임 (실행 취소/다시 실행/리플레이)
+# -----------------------------
+class RiverGame:
+    """상태 정수와 행동 기록. 기록은 상태 목록이라 undo/redo는 커서 이동뿐이다."""
+
+    def __init__(self, state=START):
+        self.states = [state]
+        self.actions = []
+        self.cursor = 0
+
+    @property
+    def state(self):
+        return self.states[self.cursor]
+
+    @property
+    def status(self):
+        return STATUS[self.state]
+
+    @property
+    def moves(self):
+        """지금까지 보트를 움직인 횟수"""
+        return sum(1 for a in self.actions[:self.cursor] if a == MOVE)
+
+    def act(self, action):
+        """행동 적용. 불가능하면 False (상태 그대로). 새 행동은 redo 기록을 지운다."""
+        if isinstance(action, str):
+            action = ACTION_OF[action]
+        nxt = TRANSITION[self.state][action]
+        if nxt == -1:
+            return False
+        del self.states[self.cursor + 1:], self.actions[self.cursor:]
+        self.states.append(nxt)
+        self.actions.append(action)
+        self.cursor += 1
+        return True
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.actions)
+
+    def undo(self):
+        if self.can_undo():
+            self.cursor -= 1
+
+    def redo(self):
+        if self.can_redo():
+            self.cursor += 1
+
+    def history(self):
+        """현재까지 행동 이름 목록 (리플레이 입력으로 그대로 쓸 수 있음)"""
+        return [ACTIONS[a] for a in self.actions[:self.cursor]]
+
+def replay(actions, state=START):
+    """행동 목록을 재생 → (상태 목록, 처음으로 실패한 행동 위치 또는 None)"""
+    states = [state]
+    for i, a in enumerate(actions):
+        nxt = TRANSITION[states[-1]][ACTION_OF[a] if isinstance(a, str) else a]
+        if nxt == -1:
+            return states, i
+        states.append(nxt)
+    return states, None
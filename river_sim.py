@@ -0,0 +1,165 @@
+# river_sim.py
+# ─────────────────────────────────────────────────────────────
+# 강 건너기 퍼즐 헤드리스 시뮬레이터 (Streamlit 의존성 없음)
+#   - river_engine의 전이표/판정표를 그대로 써서 게임 UI와 같은 규칙으로 실행
+#   - 무작위 플레이: 게임 G판을 NumPy 배열로 한꺼번에 한 걸음씩 진행 (판마다 루프 없음)
+#   - 기록 검증: 플레이어 행동 목록(JSON Lines)을 묶어서 재생, 처음 틀린 위치와 결과 집계
+#   - 처리량(행동/초)과 결과 통계 출력
+# 사용 예:
+#   python river_sim.py --games 1000000 --steps 60
+#   python river_sim.py --games 20000 --scalar           # 비교용 순수 파이썬 루프
+#   python river_sim.py --replay games.jsonl              # 한 줄 = ["goat", "move", ...]
+# ─────────────────────────────────────────────────────────────
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+import river_engine as engine
+
+# 표를 NumPy로 (상태 64 x 행동 4)
+TRANSITION = np.array(engine.TRANSITION, dtype=np.int8)
+STATUS = np.frombuffer(engine.STATUS, dtype=np.uint8)
+LEGAL = TRANSITION >= 0
+LEGAL_COUNT = LEGAL.sum(axis=1)
+# 상태별 가능한 행동을 앞에서부터 채운 표 → 균등 선택이 인덱싱 한 번
+LEGAL_ACTIONS = np.array(
+    [[a for a in range(len(engine.ACTIONS)) if LEGAL[s, a]] + [0] * (len(engine.ACTIONS) - LEGAL_COUNT[s])
+     for s in range(engine.N_STATES)],
+    dtype=np.int8,
+)
+OUTCOMES = {
+    engine.PLAYING: "unfinished",
+    engine.WOLF_ATE_GOAT: "wolf_ate_goat",
+    engine.GOAT_ATE_CABBAGE: "goat_ate_cabbage",
+    engine.WON: "won",
+}
+PAD = -1
+
+# -----------------------------
+# 1) 무작위 플레이
+# -----------------------------
+def simulate(games, max_steps=60, seed=0, legal_only=True):
+    """G판을 동시에 최대 max_steps 행동까지 진행 → (최종 상태, 보트 이동 수, 시도한 행동 수, 거부된 행동 수)
+
+    legal_only=False면 행동을 무작위로 골라 규칙이 거부하는 입력도 섞는다 (퍼징).
+    """
+    rng = np.random.default_rng(seed)
+    state = np.full(games, engine.START, dtype=np.int8)
+    moves = np.zeros(games, dtype=np.int32)
+    tried = rejected = 0
+    for _ in range(max_steps):
+        live = np.flatnonzero(STATUS[state] == engine.PLAYING)
+        if live.size == 0:
+            break
+        cur = state[live]
+        if legal_only:
+            pick = (rng.random(live.size) * LEGAL_COUNT[cur]).astype(np.int8)
+            action = LEGAL_ACTIONS[cur, pick]
+        else:
+            action = rng.integers(0, len(engine.ACTIONS), live.size, dtype=np.int8)
+        nxt = TRANSITION[cur, action]
+        ok = nxt >= 0
+        state[live[ok]] = nxt[ok]
+        moves[live[ok & (action == engine.MOVE)]] += 1
+        tried += live.size
+        rejected += int(live.size - ok.sum())
+    return state, moves, tried, rejected
+
+def simulate_scalar(games, max_steps=60, seed=0):
+    """비교용: 판마다 파이썬 루프 (같은 표 사용)"""
+    rnd = random.Random(seed)
+    table, status = engine.TRANSITION, engine.STATUS
+    legal = [[a for a in range(len(engine.ACTIONS)) if table[s][a] != -1] for s in range(engine.N_STATES)]
+    finals, moves, tried = [], [], 0
+    for _ in range(games):
+        state, n = engine.START, 0
+        for _ in range(max_steps):
+            if status[state] != engine.PLAYING:
+                break
+            action = rnd.choice(legal[state])
+            state = table[state][action]
+            n += action == engine.MOVE
+            tried += 1
+        finals.append(state)
+        moves.append(n)
+    return np.array(finals, dtype=np.int8), np.array(moves, dtype=np.int32), tried, 0
+
+# -----------------------------
+# 2) 기록 재생 (검증)
+# -----------------------------
+def encode_sequences(sequences):
+    """행동 이름 목록들 → (G, L) int8 배열 (빈칸 PAD)"""
+    width = max((len(s) for s in sequences), default=0)
+    out = np.full((len(sequences), width), PAD, dtype=np.int8)
+    for i, seq in enumerate(sequences):
+        out[i, :len(seq)] = [engine.ACTION_OF[a] for a in seq]
+    return out
+
+def replay_batch(actions):
+    """(G, L) 행동 배열을 열 단위로 한꺼번에 재생 → (최종 상태, 처음 거부된 위치(-1 = 없음), 보트 이동 수)"""
+    games, width = actions.shape
+    state = np.full(games, engine.START, dtype=np.int8)
+    first_bad = np.full(games, -1, dtype=np.int32)
+    moves = np.zeros(games, dtype=np.int32)
+    for col in range(width):
+        action = actions[:, col]
+        live = np.flatnonzero((action != PAD) & (first_bad < 0))
+        if live.size == 0:
+            continue
+        nxt = TRANSITION[state[live], action[live]]
+        ok = nxt >= 0
+        state[live[ok]] = nxt[ok]
+        moves[live[ok & (action[live] == engine.MOVE)]] += 1
+        first_bad[live[~ok]] = col
+    return state, first_bad, moves
+
+# -----------------------------
+# 3) 통계
+# -----------------------------
+def summarize(final, moves, tried, elapsed):
+    status = STATUS[final]
+    report = {
+        "games": int(final.size),
+        "actions": int(tried),
+        "seconds": round(elapsed, 4),
+        "actions_per_sec": int(tried / elapsed) if elapsed > 0 else None,
+        "outcomes": {name: int((status == code).sum()) for code, name in OUTCOMES.items()},
+    }
+    won = status == engine.WON
+    if won.any():
+        report["won_moves"] = {"min": int(moves[won].min()), "mean": round(float(moves[won].mean()), 2)}
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강 건너기 퍼즐 규칙 헤드리스 시뮬레이션")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--steps", type=int, default=60, help="판당 최대 행동 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fuzz", action="store_true", help="규칙이 거부하는 행동도 무작위로 섞기")
+    parser.add_argument("--scalar", action="store_true", help="NumPy 대신 판마다 파이썬 루프")
+    parser.add_argument("--replay", help="기록 파일 (JSON Lines, 한 줄 = 행동 이름 목록)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            sequences = [json.loads(line) for line in f if line.strip()]
+        final, first_bad, moves = replay_batch(encode_sequences(sequences))
+        report = summarize(final, moves, sum(map(len, sequences)), time.perf_counter() - t0)
+        report["rejected_games"] = int((first_bad >= 0).sum())
+    else:
+        if args.scalar:
+            final, moves, tried, rejected = simulate_scalar(args.games, args.steps, args.seed)
+        else:
+            final, moves, tried, rejected = simulate(args.games, args.steps, args.seed, legal_only=not args.fuzz)
+        report = summarize(final, moves, tried, time.perf_counter() - t0)
+        report["rejected_actions"] = rejected
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
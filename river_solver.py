@@ -0,0 +1,167 @@
+# river_solver.py
+# ─────────────────────────────────────────────────────────────
+# 일반화한 강 건너기 퍼즐 풀이기 (Streamlit 의존성 없음)
+#   - 객체 N개, "누가 누구를 먹는지" 충돌 그래프, 보트 정원 k(사람 + 최대 k개)
+#   - 상태 = (N+1)비트 정수: bit i = 객체 i 위치, bit N = 사람(=보트) 위치 (1 = 오른쪽)
+#   - 목표 상태에서 거꾸로 너비 우선 탐색(BFS) → 모든 상태의 "남은 최적 이동 수" 표
+#     (보트 이동은 자기 자신이 역연산이라 그래프가 무방향)
+#   - 프런티어 전체를 NumPy 배열로 한 번에 확장: 탑승 조합 마스크마다 벡터 연산 한 번
+#   - 20개 객체(2^21 ≈ 210만 상태)도 1~3초, 추가 메모리 약 50MB
+# 사용 예:
+#   python river_solver.py                          # 늑대·양·양배추
+#   python river_solver.py --chain 20 --conflicts 2 --capacity 2   # 20개 중 앞 3개만 사슬
+# ─────────────────────────────────────────────────────────────
+import argparse
+import time
+from itertools import combinations
+
+import numpy as np
+
+UNREACHED = -1
+
+class Puzzle:
+    """객체 목록 + 충돌 (포식자, 먹이) 쌍 + 보트 정원."""
+
+    def __init__(self, items, eats, capacity=1):
+        self.items = list(items)
+        self.index = {name: i for i, name in enumerate(self.items)}
+        self.eats = [(self.index[a], self.index[b]) for a, b in eats]
+        self.capacity = capacity
+        self.n = len(self.items)
+        self.person = 1 << self.n
+        self.goal = (1 << (self.n + 1)) - 1
+        self.dtype = np.uint32 if self.n < 31 else np.uint64
+        # 한 번에 태울 수 있는 객체 조합 (빈 보트 포함)
+        self.loads = np.array(
+            [sum(1 << i for i in combo) for r in range(capacity + 1) for combo in combinations(range(self.n), r)],
+            dtype=self.dtype,
+        )
+        self._safe = None
+        self._dist = None
+
+    # -----------------------------
+    # 1) 안전 표
+    # -----------------------------
+    def safe_table(self):
+        """상태 → 안전 여부 (bool 배열, 길이 2^(N+1)). 사람이 없는 둑에 포식자·먹이가 함께 있으면 위험."""
+        if self._safe is None:
+            states = np.arange(1 << (self.n + 1), dtype=self.dtype)
+            person = (states >> self.n) & 1
+            unsafe = np.zeros(states.shape, dtype=bool)
+            for a, b in self.eats:
+                side_a = (states >> a) & 1
+                unsafe |= (side_a == ((states >> b) & 1)) & (side_a != person)
+            self._safe = ~unsafe
+        return self._safe
+
+    # -----------------------------
+    # 2) 거리 표 (목표에서 역방향 BFS)
+    # -----------------------------
+    def neighbors(self, frontier):
+        """프런티어 상태 배열 → 안전한 이웃 상태 배열 (중복 포함)"""
+        safe = self.safe_table()
+        person_right = (frontier & self.person) != 0
+        out = []
+        for m in self.loads:
+            # 태울 객체가 모두 사람과 같은 둑에 있어야 한다
+            with_person = np.where(person_right, (frontier & m) == m, (frontier & m) == 0)
+            nxt = frontier[with_person] ^ (self.person | m)
+            out.append(nxt[safe[nxt]])
+        return np.concatenate(out) if out else frontier[:0]
+
+    def distances(self):
+        """상태 → 목표까지 최소 보트 이동 수 (도달 불가 = -1). 이 표가 방문 집합도 겸한다.
+
+        같은 깊이의 상태는 사람이 모두 같은 둑에 있으므로(이동마다 뒤집힘) 조합 마스크별
+        검사가 배열 연산 한 번이다. 이웃을 모아 두지 않고 마스크마다 바로 표에 기록하고,
+        다음 프런티어는 표에서 이번 깊이 값을 가진 칸을 찾아 만든다(중복 제거 겸용).
+        """
+        if self._dist is None:
+            safe = self.safe_table()
+            dist = np.full(1 << (self.n + 1), UNREACHED, dtype=np.int16)
+            dist[self.goal] = 0
+            frontier = np.array([self.goal], dtype=self.dtype)
+            depth = 0
+            while frontier.size:
+                depth += 1
+                right = bool(frontier[0] & self.person)
+                for m in self.loads:
+                    sel = frontier[(frontier & m) == (m if right else 0)]
+                    nxt = sel ^ (self.person | m)
+                    nxt = nxt[safe[nxt]]
+                    dist[nxt[dist[nxt] == UNREACHED]] = depth
+                frontier = np.flatnonzero(dist == depth).astype(self.dtype)
+            self._dist = dist
+        return self._dist
+
+    # -----------------------------
+    # 3) 풀이 / 힌트
+    # -----------------------------
+    def carried(self, state, nxt):
+        """두 상태 사이에 보트로 옮긴 객체 이름 목록"""
+        diff = (state ^ nxt) & (self.person - 1)
+        return [self.items[i] for i in range(self.n) if diff >> i & 1]
+
+    def hint(self, state):
+        """(남은 최적 이동 수, [다음에 태울 객체 조합 후보...]). 이미 졌거나 갈 수 없으면 (-1, [])"""
+        dist = self.distances()
+        d = int(dist[state])
+        if d <= 0:
+            return d, []
+        nxt = self.neighbors(np.array([state], dtype=self.dtype))
+        best = np.unique(nxt[dist[nxt] == d - 1])
+        return d, [self.carried(state, int(s)) for s in best]
+
+    def solve(self, state=0):
+        """state(기본: 모두 왼쪽)에서 목표까지 최적 이동 목록 [[태운 객체...], ...] 또는 None"""
+        dist = self.distances()
+        if dist[state] == UNREACHED:
+            return None
+        path = []
+        while state != self.goal:
+            nxt = self.neighbors(np.array([state], dtype=self.dtype))
+            step = int(nxt[dist[nxt] == dist[state] - 1][0])
+            path.append(self.carried(state, step))
+            state = step
+        return path
+
+# 원래 게임: 사람 + 1, 늑대 → 양 → 양배추
+CLASSIC = Puzzle(["wolf", "goat", "cabbage"], [("wolf", "goat"), ("goat", "cabbage")], capacity=1)
+
+def from_engine(state):
+    """river_engine 상태 정수(사람 bit0, 늑대·양·양배추 bit1~3) → CLASSIC 상태"""
+    return ((state >> 1) & 0b111) | ((state & 1) << 3)
+
+def chain_puzzle(n, capacity, conflicts=None):
+    """객체 i가 객체 i+1을 먹는 사슬 (앞에서부터 conflicts쌍만, 기본: 전부).
+    충돌이 적을수록 도달 가능한 상태가 많아진다 (풀이기 부하 시험용)."""
+    items = [f"item{i}" for i in range(n)]
+    pairs = list(zip(items, items[1:]))
+    return Puzzle(items, pairs if conflicts is None else pairs[:conflicts], capacity)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="일반화 강 건너기 퍼즐 최적 풀이")
+    parser.add_argument("--chain", type=int, help="객체 수 N (i가 i+1을 먹는 사슬). 생략하면 늑대·양·양배추")
+    parser.add_argument("--conflicts", type=int, help="--chain에서 충돌 쌍 수 (기본: N-1)")
+    parser.add_argument("--capacity", type=int, default=1, help="사람 외 보트 정원 k")
+    args = parser.parse_args(argv)
+
+    puzzle = chain_puzzle(args.chain, args.capacity, args.conflicts) if args.chain else Puzzle(
+        CLASSIC.items, [(CLASSIC.items[a], CLASSIC.items[b]) for a, b in CLASSIC.eats], args.capacity)
+    t0 = time.perf_counter()
+    dist = puzzle.distances()
+    elapsed = time.perf_counter() - t0
+    path = puzzle.solve()
+    reachable = int((dist != UNREACHED).sum())
+    print(f"상태 {dist.size:,}개 중 도달 가능 {reachable:,}개, 표 {dist.nbytes / 2**20:.1f}MB, {elapsed:.2f}초")
+    if path is None:
+        print("풀이 없음")
+        return
+    print(f"최적 이동 {len(path)}회")
+    for i, load in enumerate(path[:40], 1):
+        print(f"{i:>3}. {'→' if i % 2 else '←'} {', '.join(load) or '(빈 보트)'}")
+    if len(path) > 40:
+        print("  …")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# river_telemetry.py
+# ─────────────────────────────────────────────────────────────
+# 강 건너기 퍼즐 기록/순위표 (Streamlit 의존성 없음)
+#   - 행동 하나하나(events)와 판 결과(games)를 write-behind 큐로 모아 SQLite에 배치 기록
+#     → 게임 콜백은 메모리 큐에 넣고 바로 반환 (디스크 I/O 대기 없음)
+#   - 결과별 집계(outcome_stats)는 판이 끝날 때마다 같은 트랜잭션에서 +1 갱신
+#   - 순위표는 승리 판만 담은 부분 인덱스를 앞에서 N개 읽을 뿐 (전체 스캔 없음)
+#   - events.action에는 엔진 행동만, 되돌리기/다시 하기는 nav 열에 따로 기록.
+#     판마다 실제로 남은 행동 목록(games.history)은 river_sim --replay로 그대로 검증 가능
+# 사용 예:
+#   python river_telemetry.py                # 순위표·통계 출력
+#   python river_telemetry.py --top 20
+#   python river_telemetry.py --export-replays games.jsonl && python river_sim.py --replay games.jsonl
+# ─────────────────────────────────────────────────────────────
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import river_engine as engine
+from writebehind import WriteBehind
+
+DB_PATH = os.path.join(".river_stats", "telemetry.sqlite")
+
+# 판 결과: river_engine 판정 + 끝내지 않고 초기화한 판
+ABANDONED = -1
+OUTCOME_NAMES = {
+    engine.WON: "성공",
+    engine.WOLF_ATE_GOAT: "늑대가 양을 먹음",
+    engine.GOAT_ATE_CABBAGE: "양이 양배추를 먹음",
+    ABANDONED: "중간에 그만둠",
+}
+FAILURES = (engine.WOLF_ATE_GOAT, engine.GOAT_ATE_CABBAGE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS events (
+  game_id TEXT NOT NULL, seq INTEGER NOT NULL,
+  action TEXT,              -- 엔진 행동 ('move', 'goat', …) 또는 NULL
+  nav TEXT,                 -- 'undo' | 'redo' 또는 NULL
+  state INTEGER NOT NULL, ts REAL NOT NULL,
+  PRIMARY KEY (game_id, seq)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS games (
+  game_id TEXT PRIMARY KEY, player TEXT, outcome INTEGER NOT NULL,
+  moves INTEGER NOT NULL, actions INTEGER NOT NULL, seconds REAL NOT NULL, ended REAL NOT NULL,
+  history TEXT NOT NULL);   -- 되돌리기를 반영한 최종 행동 목록 (JSON)
+CREATE INDEX IF NOT EXISTS games_fewest ON games (moves, seconds) WHERE outcome = {engine.WON};
+CREATE INDEX IF NOT EXISTS games_fastest ON games (seconds) WHERE outcome = {engine.WON};
+CREATE INDEX IF NOT EXISTS games_ended ON games (ended);
+CREATE TABLE IF NOT EXISTS outcome_stats (
+  outcome INTEGER PRIMARY KEY, games INTEGER NOT NULL, moves INTEGER NOT NULL, seconds REAL NOT NULL);
+"""
+SCHEMA_VERSION = 2
+
+# 1판 스키마(events.action에 'undo'/'redo', games.history 없음) → 2판
+MIGRATE_V1 = """
+ALTER TABLE events RENAME TO events_v1;
+CREATE TABLE events (
+  game_id TEXT NOT NULL, seq INTEGER NOT NULL, action TEXT, nav TEXT,
+  state INTEGER NOT NULL, ts REAL NOT NULL,
+  PRIMARY KEY (game_id, seq)) WITHOUT ROWID;
+INSERT INTO events SELECT game_id, seq,
+  CASE WHEN action IN ('undo', 'redo') THEN NULL ELSE action END,
+  CASE WHEN action IN ('undo', 'redo') THEN action END, state, ts FROM events_v1;
+DROP TABLE events_v1;
+ALTER TABLE games ADD COLUMN history TEXT NOT NULL DEFAULT '[]';
+"""
+
+# -----------------------------
+# 1) 저장소
+# -----------------------------
+class Telemetry:
+    """move()/finish()는 큐에 넣기만 하고, 백그라운드 스레드가 한 트랜잭션으로 묶어 기록한다.
+    같은 판의 결과는 처음 것만 남는다 (실패한 배치를 재시도해도 중복 집계 안 함)."""
+
+    def __init__(self, path=DB_PATH, max_batch=500, interval=0.5):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.queue = WriteBehind(self._write, max_batch=max_batch, interval=interval, name="river-telemetry")
+
+    @staticmethod
+    def _migrate(conn):
+        """예전 스키마 DB면 기록을 보존한 채 현재 스키마로 옮긴다 (옛 판의 history는 빈 목록)"""
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(games)")}
+        if columns and "history" not in columns:
+            conn.executescript(MIGRATE_V1)
+
+    def _conn(self):
+        """스레드마다 연결 하나"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # ---- 기록 (호출 스레드: 큐에 넣기만) ----
+    @staticmethod
+    def new_game():
+        return uuid.uuid4().hex
+
+    def move(self, game_id, seq, action, state, ts=None):
+        """엔진 행동 하나 (action: river_engine.ACTIONS 중 하나, state: 행동 뒤 상태 정수)"""
+        if action not in engine.ACTION_OF:
+            raise ValueError(f"엔진 행동이 아닙니다: {action!r}")
+        self.queue.submit(("event", (game_id, seq, action, None, state, ts or time.time())))
+
+    def navigate(self, game_id, seq, nav, state, ts=None):
+        """되돌리기/다시 하기 (nav: 'undo' | 'redo')"""
+        self.queue.submit(("event", (game_id, seq, None, nav, state, ts or time.time())))
+
+    def finish(self, game_id, outcome, moves, actions, seconds, history, player=None, ts=None):
+        """판 결과. history: RiverGame.history() (되돌린 행동은 빠진 최종 목록)"""
+        self.queue.submit(("game", (game_id, player or None, outcome, moves, actions, seconds,
+                                    ts or time.time(), json.dumps(history))))
+
+    # ---- 기록 (백그라운드 스레드) ----
+    def _write(self, items):
+        events = [row for kind, row in items if kind == "event"]
+        games = [row for kind, row in items if kind == "game"]
+        with self._conn() as conn:   # 배치 하나 = 트랜잭션 하나
+            conn.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?)", events)
+            for row in games:
+                if conn.execute("INSERT OR IGNORE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row).rowcount:
+                    _, _, outcome, moves, _, seconds, _, _ = row
+                    conn.execute(
+                        "INSERT INTO outcome_stats VALUES (?, 1, ?, ?) ON CONFLICT(outcome) DO UPDATE SET"
+                        " games = games + 1, moves = moves + excluded.moves, seconds = seconds + excluded.seconds",
+                        (outcome, moves, seconds),
+                    )
+
+    def flush(self, timeout=None):
+        return self.queue.flush(timeout)
+
+    def close(self):
+        self.queue.close()
+
+    # ---- 조회 (집계표·부분 인덱스만 읽음) ----
+    def leaderboard(self, top=10, by="moves"):
+        """승리 판 상위 N개 [(player, moves, seconds, ended), ...]. by='moves'(최소 이동) | 'seconds'(최단 시간)"""
+        order = "moves, seconds" if by == "moves" else "seconds"
+        # 부분 인덱스를 타려면 조건이 인덱스 정의와 같은 상수여야 한다 (바인딩 변수 X)
+        return self._conn().execute(
+            f"SELECT player, moves, seconds, ended FROM games WHERE outcome = {engine.WON} ORDER BY {order} LIMIT ?",
+            (top,),
+        ).fetchall()
+
+    def stats(self):
+        """결과별 {outcome: (판 수, 평균 이동, 평균 시간)} + 가장 흔한 실패 원인"""
+        rows = self._conn().execute("SELECT outcome, games, moves, seconds FROM outcome_stats").fetchall()
+        by_outcome = {o: (n, m / n, s / n) for o, n, m, s in rows if n}
+        failures = [(by_outcome[o][0], o) for o in FAILURES if o in by_outcome]
+        return {
+            "outcomes": by_outcome,
+            "games": sum(v[0] for v in by_outcome.values()),
+            "top_failure": max(failures)[1] if failures else None,
+        }
+
+    def replays(self):
+        """끝난 판마다 (game_id, outcome, 행동 이름 목록) — river_engine.replay / river_sim 입력 그대로"""
+        for game_id, outcome, history in self._conn().execute("SELECT game_id, outcome, history FROM games"):
+            yield game_id, outcome, json.loads(history)
+
+# -----------------------------
+# 2) CLI
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강 건너기 퍼즐 순위표·통계")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--export-replays", metavar="PATH", help="판별 행동 목록을 JSON Lines로 저장 (river_sim --replay 입력)")
+    args = parser.parse_args(argv)
+
+    tm = Telemetry(args.db)
+    if args.export_replays:
+        with open(args.export_replays, "w", encoding="utf-8") as f:
+            n = sum(f.write(json.dumps(history) + "\n") > 0 for _, _, history in tm.replays())
+        print(f"{n:,}판 저장: {args.export_replays}")
+        tm.close()
+        return
+    stats = tm.stats()
+    print(f"전체 {stats['games']:,}판")
+    for outcome, (n, moves, seconds) in sorted(stats["outcomes"].items()):
+        print(f"  {OUTCOME_NAMES.get(outcome, outcome)}: {n:,}판, 평균 이동 {moves:.1f}회, 평균 {seconds:.1f}초")
+    if stats["top_failure"] is not None:
+        print(f"가장 흔한 실패: {OUTCOME_NAMES[stats['top_failure']]}")
+    for by, title in (("moves", "최소 이동"), ("seconds", "최단 시간")):
+        print(f"\n[{title}]")
+        for i, (player, moves, seconds, _) in enumerate(tm.leaderboard(args.top, by), 1):
+            print(f"{i:>3}. {player or '익명'}  {moves}회  {seconds:.1f}초")
+    tm.close()
+
+if __name__ == "__main__":
+    main()
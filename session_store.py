@@ -0,0 +1,150 @@
+# session_store.py
+# ─────────────────────────────────────────────────────────────
+# Study Coach 세션 저장소 (Streamlit 의존성 없음)
+#   - 세션 id → 작은 JSON dict (목표, 유형, 마지막 플랜 등)
+#   - 메모리에는 최근 사용 세션만 두고 오래 쉬거나 개수를 넘으면 내보냄(evict)
+#   - 변경은 write-behind 큐로 모아 백엔드(기본: 로컬 SQLite)에 한꺼번에 기록
+# 백엔드 교체: load(sid) / save_many([(sid, json, ts), ...]) 두 메서드만 있으면 된다.
+# ─────────────────────────────────────────────────────────────
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from writebehind import WriteBehind
+
+DB_PATH = os.path.join(".study_sessions", "sessions.sqlite")
+IDLE_SECONDS = 30 * 60
+MAX_SESSIONS = 2_000
+
+# -----------------------------
+# 1) SQLite 백엔드
+# -----------------------------
+class SQLiteBackend:
+    """sessions(sid PK, data JSON, updated) 테이블 하나. WAL이라 읽기와 배치 쓰기가 서로 막지 않는다."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        """스레드마다 연결 하나 (sqlite3 연결은 스레드 간 공유하지 않는다)"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def load(self, sid):
+        row = self._conn().execute("SELECT data FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_many(self, rows):
+        with self._conn() as conn:   # 배치 하나 = 트랜잭션 하나
+            conn.executemany(
+                "INSERT INTO sessions (sid, data, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(sid) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                rows,
+            )
+
+# -----------------------------
+# 2) 세션 저장소
+# -----------------------------
+class SessionStore:
+    """프로세스 공용 세션 캐시 + write-behind 영속화.
+
+    get()/update()는 메모리에서만 일하고, 바뀐 세션의 스냅숏은 큐에 넣어 두면
+    백그라운드 스레드가 모아서 기록한다. 같은 세션의 미기록 스냅숏은 마지막 것만 남는다.
+    """
+
+    def __init__(self, backend=None, idle_seconds=IDLE_SECONDS, max_sessions=MAX_SESSIONS,
+                 max_batch=500, interval=1.0):
+        self.backend = backend or SQLiteBackend()
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.cache = OrderedDict()          # sid → (data, 마지막 접근 시각), 오래된 순
+        self.dirty = {}                     # 아직 기록되지 않은 sid → 마지막 스냅숏 시각 (evict 금지)
+        self.lost = 0                       # 재시도 끝에 기록을 포기한 스냅숏 수
+        self.lock = threading.Lock()
+        self.queue = WriteBehind(self._write, max_batch=max_batch, interval=interval,
+                                 key_of=lambda row: row[0], name="session-store", on_drop=self._drop)
+
+    def _write(self, rows):
+        self.backend.save_many(rows)
+        with self.lock:
+            for sid, _, ts in rows:
+                if self.dirty.get(sid) == ts:
+                    del self.dirty[sid]
+            self._evict(time.time())    # 기록을 기다리느라 남겨 둔 세션도 이제 내보낼 수 있다
+
+    def _drop(self, rows):
+        """기록을 포기한 세션은 dirty에서 빼서 다시 내보낼 수 있게 한다 (메모리 상한 유지)"""
+        with self.lock:
+            self.lost += len(rows)
+            for sid, _, ts in rows:
+                if self.dirty.get(sid) == ts:
+                    del self.dirty[sid]
+            self._evict(time.time())
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self, sid):
+        """세션 dict 사본 (없으면 빈 dict)"""
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(sid)
+            if entry is not None:
+                self.cache[sid] = (entry[0], now)
+                self.cache.move_to_end(sid)
+                return dict(entry[0])
+        data = self.backend.load(sid) or {}   # 캐시에 없을 때만 디스크 조회 (잠금 밖)
+        with self.lock:
+            self.cache[sid] = (data, now)
+            self.cache.move_to_end(sid)
+            self._evict(now)
+        return dict(data)
+
+    def update(self, sid, **values):
+        """값이 실제로 바뀐 경우에만 스냅숏을 기록 큐에 넣는다. 바뀌었으면 True."""
+        data = self.get(sid)
+        if all(data.get(k) == v for k, v in values.items()):
+            return False
+        data.update(values)
+        now = time.time()
+        with self.lock:
+            self.cache[sid] = (data, now)
+            self.cache.move_to_end(sid)
+            self.dirty[sid] = now
+            self._evict(now)
+        self.queue.submit((sid, json.dumps(data, ensure_ascii=False), now))
+        return True
+
+    def _evict(self, now):
+        """오래 쉰 세션과 개수 초과분을 메모리에서 내보낸다.
+        아직 기록 전인 세션은 건너뛴다 (내보낸 뒤 디스크에서 옛 값을 읽지 않도록)."""
+        stale = []
+        for sid, (_, last) in self.cache.items():
+            if len(self.cache) - len(stale) <= self.max_sessions and now - last <= self.idle_seconds:
+                break
+            if sid not in self.dirty:
+                stale.append(sid)
+        for sid in stale:
+            del self.cache[sid]
+
+    def flush(self, timeout=None):
+        return self.queue.flush(timeout)
+
+    def close(self):
+        self.queue.close()
@@ -0,0 +1,577 @@
+# study_core.py
+# ─────────────────────────────────────────────────────────────
+# MBTI Study Coach(mbti.py)의 추천 데이터 + HTML 카드 템플릿 (Streamlit 의존성 없음)
+#   - 유형별 추천/공통 팁은 모듈 import 때 한 번만 만든다
+#   - 카드 HTML도 import 때 미리 렌더링하고, goal·hours 같은 사용자 값만 끼워 넣는다
+#   - 반 전체 명단(CSV) → 학생별 Markdown 플랜 ZIP (프로세스 풀, 스트리밍 기록)
+# 배치 실행:
+#   python study_core.py roster.csv -o plans.zip --workers 8
+# ─────────────────────────────────────────────────────────────
+import argparse
+import csv
+import html
+import io
+import os
+import re
+import sys
+import zipfile
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from css_util import minify_css
+
+# -----------------------------
+# 1) 추천 데이터
+# -----------------------------
+MBTIS = [
+    "INTJ","INTP","ENTJ","ENTP",
+    "INFJ","INFP","ENFJ","ENFP",
+    "ISTJ","ISFJ","ESTJ","ESFJ",
+    "ISTP","ISFP","ESTP","ESFP"
+]
+
+TEMPERAMENT = {
+    "Analysts": ["INTJ", "INTP", "ENTJ", "ENTP"],
+    "Diplomats": ["INFJ", "INFP", "ENFJ", "ENFP"],
+    "Sentinels": ["ISTJ", "ISFJ", "ESTJ", "ESFJ"],
+    "Explorers": ["ISTP", "ISFP", "ESTP", "ESFP"]
+}
+
+QUOTES = [
+    "오늘의 1%가 내일의 100%를 바꾼다. ✨",
+    "완벽보다 완료. Done is better than perfect. ✅",
+    "기억은 테스트할수록 강해진다. 🧠",
+    "작은 습관이 큰 차이를 만든다. 🌱",
+]
+
+# 공통 템플릿
+BASE_TIPS = {
+    "focus": [
+        "⏱️ **포모도로 25/5**: 25분 몰입 + 5분 리셋을 4세트(=2시간)로 묶기",
+        "📵 **방해요소 차단**: 알림 끄기 + 공부 앱 전용 홈 화면 만들기",
+        "🧠 **테스트 우선학습**: 읽기 전에 먼저 문제부터 풀어 약점 드러내기 (Active Recall)",
+    ],
+    "tools": [
+        "🗺️ **개념 지도(마인드맵)**",
+        "📑 **요약 카드(Anki/퀴즈카드)**",
+        "🧩 **학습 루틴 자동화(체크리스트 & 타이머)**"
+    ],
+    "pitfalls": [
+        "🐌 시작 지연(완벽주의/과도한 준비)",
+        "📚 수동적 읽기만 반복",
+        "📵 알림/메신저에 의한 잦은 맥락 전환"
+    ],
+    "mini_habits": [
+        "📘 **2쪽만 읽기**로 시작 → 탄력 붙이면 확장",
+        "✍️ **1개 핵심문장**만 요약",
+        "🛎️ 공부 전 **의식 30초**(물 한 컵+심호흡 5회)"
+    ],
+}
+
+# 유형별 커스텀
+CUSTOM_TIPS = {
+    "INTJ": dict(
+        slogan="전략적 마스터플랜으로 조용히 1등하는 타입 🧩🧠",
+        best=["🎯 목표 역산(시험일 → 주/일 단위 역스케줄)", "📈 취약파트 데이터화(오답률/시간)"],
+        how=["개념 → 문제 → 오답 → 재정리의 **폐쇄 루프**", "깊게 파되 **마감시간 하드코어**로 둬 과몰입 방지"],
+    ),
+    "INTP": dict(
+        slogan="원리 탐구와 가설 검증의 장인 🔬🌀",
+        best=["왜?를 3번 묻는 **원인사슬 분석**", "개념 간 **연결 그래프** 만들기"],
+        how=["공부한 걸 **블로그/노션 글**로 구조화", "문제를 **스스로 만들어 보기**"],
+    ),
+    "ENTJ": dict(
+        slogan="목표를 쪼개고 밀어붙이는 실행가 🚀📊",
+        best=["OKR/KR로 **측정 가능한 목표**", "매주 **리뷰 & 피벗**"],
+        how=["타임블록으로 **공격적 일정**", "스터디 리딩하며 **가르치기 = 최강 복습**"],
+    ),
+    "ENTP": dict(
+        slogan="아이디어 폭발, 변주와 실험의 플레이어 ⚡🧠",
+        best=["**다중 전략 A/B 테스트**", "친구와 **토론-스파링**으로 기억 고착"],
+        how=["새롭고 재밌는 포맷(카툰 요약/밈)으로 재해석", "**제한시간 퀴즈쇼**로 집중 부스팅"],
+    ),
+    "INFJ": dict(
+        slogan="의미와 일관성에 강한 조용한 설계자 🌙📐",
+        best=["**가치-목표 정렬**(왜 이걸 배우는가)", "조용한 **딥워크 슬롯** 확보"],
+        how=["개념을 **스토리로 엮기**", "주 1회 **회고 저널링**"],
+    ),
+    "INFP": dict(
+        slogan="몰입하면 끝까지 가는 감성형 딥다이버 🎨🌊",
+        best=["작은 **시작 의식**으로 감정 시동", "좋아하는 **테마/사례**로 연결"],
+        how=["**감정-동기 트래커**로 에너지 관리", "**음악·향** 등 환경 큐"],
+    ),
+    "ENFJ": dict(
+        slogan="사람을 움직이고 학습을 조직하는 코치형 🤝🌟",
+        best=["미니 클래스처럼 **가르치며 배우기**", "파트너와 **상호 책임**"],
+        how=["**진도 공유 대시보드**", "칭찬·보상 **게이미피케이션**"],
+    ),
+    "ENFP": dict(
+        slogan="흥미 스파크로 학습을 확장하는 탐험가 ✨🧭",
+        best=["**퀘스트 보드**로 다양 과제 병렬", "시간 제한 **스프린트**"],
+        how=["보상 스티커/이모지 **레벨업 시스템**", "지루해지면 **장소·방식 스위치**"],
+    ),
+    "ISTJ": dict(
+        slogan="체계·규칙·성실의 정석형 📏🧱",
+        best=["**체크리스트-템플릿** 기반 반복", "누적 복습 **스페이싱**"],
+        how=["오답노트 표준 양식", "매일 같은 시간 **루틴 고정**"],
+    ),
+    "ISFJ": dict(
+        slogan="차분한 돌봄형, 꾸준함이 무기 🌿📒",
+        best=["작은 **성공경험** 쌓기", "친숙한 **예시-유추** 사용"],
+        how=["조용한 공간 + **의식 루틴**", "응원 파트너와 **안부 체크**"],
+    ),
+    "ESTJ": dict(
+        slogan="명확한 기준과 결과를 중시하는 실무형 🧭📈",
+        best=["**목표-측정-피드백** 사이클", "타이머로 **산출물 우선**"],
+        how=["일간 KPI(문제 수/요약 수)", "주간 **성과 리뷰**"],
+    ),
+    "ESFJ": dict(
+        slogan="협력과 책임감의 팀 플레이어 🧡📋",
+        best=["스터디 **배치 학습**", "타인에게 설명하며 **기억 강화**"],
+        how=["**공유 노트**로 함께 완성", "서로 칭찬·보상 **사회적 강화**"],
+    ),
+    "ISTP": dict(
+        slogan="문제 해결형 메이커, 손으로 이해하는 타입 🛠️🧩",
+        best=["**실습/적용 문제** 우선", "시간 제한 **스피드런**"],
+        how=["핵심 공식을 **치트시트**로", "**데모-케이스** 먼저 보고 이론 연결"],
+    ),
+    "ISFP": dict(
+        slogan="감각·미감에 강한 섬세한 몰입가 🌸🎧",
+        best=["미니멀 환경 + **감각 큐(플레이리스트)**", "예쁜 **비주얼 노트**"],
+        how=["**감정 소요 기록**으로 과부하 방지", "짧고 잦은 **마이크로세션**"],
+    ),
+    "ESTP": dict(
+        slogan="실전 감각과 승부욕의 스프린터 🏁⚡",
+        best=["**모의고사/기출**로 바로 붙어보기", "랭킹/시간기록 **게임화**"],
+        how=["**즉시 피드백** 장치", "스탠딩 데스크/짧은 **액티브 브레이크**"],
+    ),
+    "ESFP": dict(
+        slogan="에너지·사교·경험 학습의 달인 🎉🎶",
+        best=["**스터디 쇼케이스**(발표/퀴즈 진행)", "알록달록 **보상 시스템**"],
+        how=["**음악 리듬 학습**(용어-박자 매칭)", "친구와 **역할놀이**로 개념 재연"],
+    ),
+}
+
+DEFAULT_TIPS = dict(
+    slogan="나만의 방식으로 꽃피우는 러너 🌱",
+    best=["루틴을 작게, 꾸준히", "기록으로 나의 방법을 발견"],
+    how=["작-실-기(작게→실행→기록)", "주 1회 회고로 미세 조정"],
+)
+
+# -----------------------------
+# 1-1) 성향축 점수 엔진
+# -----------------------------
+# 프로필 = 4개 성향축(E/N/T/J 쪽이면 +1, 반대면 -1, 모르면 0) + 4개 기질 소속 확률.
+# 전략 = 그 전략을 추천한 유형의 축 부호 x AXIS_WEIGHT + 기질 원-핫 x TEMPERAMENT_WEIGHT.
+# 점수는 프로필 행렬 @ 전략 가중치 행렬ᵀ 한 번으로 사용자 수천 명을 함께 계산한다.
+AXES = [("E", "I"), ("N", "S"), ("T", "F"), ("J", "P")]
+TEMPERAMENTS = list(TEMPERAMENT)
+AXIS_WEIGHT = 0.5
+TEMPERAMENT_WEIGHT = 1.0
+PARTIAL_TYPE = re.compile(r"^[EIX?_*][NSX?_*][TFX?_*][JPX?_*]$")
+
+def _type_weights(mbti):
+    axes = [AXIS_WEIGHT if mbti[i] == first else -AXIS_WEIGHT for i, (first, _) in enumerate(AXES)]
+    temps = [TEMPERAMENT_WEIGHT if mbti in TEMPERAMENT[t] else 0.0 for t in TEMPERAMENTS]
+    return axes + temps
+
+# 전략 목록: 같은 순번끼리 유형 순서대로 (동점이면 여러 유형의 전략이 번갈아 나온다)
+STRATEGIES = [
+    (kind, m, text)
+    for kind in ("best", "how")
+    for j in range(2)
+    for m in MBTIS
+    for text in CUSTOM_TIPS[m][kind][j:j + 1]
+]
+STRATEGY_KIND = np.array([k for k, _, _ in STRATEGIES])
+STRATEGY_WEIGHTS = np.array([_type_weights(m) for _, m, _ in STRATEGIES], dtype=np.float32)   # (S, 8)
+TYPE_WEIGHTS = np.array([_type_weights(m) for m in MBTIS], dtype=np.float32)                  # (16, 8)
+
+def profile_from_axes(probs):
+    """축별 E/N/T/J 쪽 확률 (n, 4) → 프로필 행렬 (n, 8)"""
+    probs = np.clip(np.asarray(probs, dtype=np.float32).reshape(-1, 4), 0.0, 1.0)
+    n, t, j = probs[:, 1], probs[:, 2], probs[:, 3]
+    temps = np.stack([n * t, n * (1 - t), (1 - n) * j, (1 - n) * (1 - j)], axis=1)
+    return np.hstack([2 * probs - 1, temps])
+
+def axis_probs(value):
+    """'INxJ' 같은 (부분) 유형 문자열 또는 {'E': 30, 'N': 70, ...} 성향 % → 축별 확률 4개.
+    해석할 수 없으면 None. 모르는 축(x, ?, 빠진 키)은 0.5."""
+    if isinstance(value, Mapping):
+        probs = []
+        for first, second in AXES:
+            if first in value:
+                probs.append(float(value[first]) / 100)
+            elif second in value:
+                probs.append(1 - float(value[second]) / 100)
+            else:
+                probs.append(0.5)
+        return probs
+    text = str(value).strip().upper()
+    if not PARTIAL_TYPE.match(text):
+        return None
+    return [1.0 if c == first else 0.0 if c == second else 0.5 for c, (first, second) in zip(text, AXES)]
+
+def profile_label(probs):
+    """축별 확률 → 'INxJ' 형태 표시 이름 (정확히 반반이면 x)"""
+    return "".join(first if p > 0.5 else second if p < 0.5 else "x" for p, (first, second) in zip(probs, AXES))
+
+def rank_strategies(profiles, k=4, kind=None):
+    """프로필 (n, 8) → 상위 k개 전략 (인덱스 (n, k), 점수 (n, k)). kind: 'best' | 'how' | None"""
+    scores = np.asarray(profiles, dtype=np.float32) @ STRATEGY_WEIGHTS.T      # (n, S)
+    if kind is not None:
+        scores = np.where(STRATEGY_KIND == kind, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+def specs_for(values):
+    """유형 문자열/성향 % 목록 → 추천 dict(slogan, best, how) 목록 (한 번의 행렬 곱으로 배치 계산).
+    정확한 16개 유형은 손으로 고른 추천을 그대로 쓰고, 부분 유형·성향 %는 점수 엔진으로 고른다."""
+    specs = [None] * len(values)
+    rows, probs = [], []
+    for i, v in enumerate(values):
+        if isinstance(v, str) and v in CUSTOM_TIPS:
+            specs[i] = CUSTOM_TIPS[v]
+            continue
+        p = axis_probs(v)
+        if p is None or all(x == 0.5 for x in p):   # 해석 불가 또는 정보 없음
+            specs[i] = DEFAULT_TIPS
+        else:
+            rows.append(i)
+            probs.append(p)
+    if rows:
+        profiles = profile_from_axes(probs)
+        best, _ = rank_strategies(profiles, 2, "best")
+        how, _ = rank_strategies(profiles, 2, "how")
+        nearest = np.argmax(profiles @ TYPE_WEIGHTS.T, axis=1)
+        for r, i in enumerate(rows):
+            specs[i] = dict(
+                slogan=f"{profile_label(probs[r])}: {CUSTOM_TIPS[MBTIS[nearest[r]]]['slogan']}",
+                best=[STRATEGIES[s][2] for s in best[r]],
+                how=[STRATEGIES[s][2] for s in how[r]],
+            )
+    return specs
+
+def tips_for(mbti):
+    """(공통 팁, 추천) — mbti는 16개 유형, 'INxJ' 같은 부분 유형, 또는 성향 % dict"""
+    if isinstance(mbti, str) and mbti in CUSTOM_TIPS:
+        return BASE_TIPS, CUSTOM_TIPS[mbti]
+    return BASE_TIPS, specs_for([mbti])[0]
+
+# -----------------------------
+# 2) 스타일
+# -----------------------------
+STYLE = "<style>" + minify_css("""
+/* 배경 그라데이션 느낌 */
+.stApp {
+  background: radial-gradient(1200px 600px at 20% 10%, #fff7e6 0%, transparent 60%),
+              radial-gradient(1200px 600px at 80% 20%, #e6f7ff 0%, transparent 60%),
+              radial-gradient(1200px 600px at 50% 90%, #f6ffed 0%, transparent 60%);
+}
+
+/* 반짝이는 이모지 효과 */
+.sparkle {
+  display: inline-block;
+  animation: pop 1.2s ease-in-out infinite;
+}
+@keyframes pop {
+  0% { transform: translateY(0) scale(1); filter: drop-shadow(0 0 0px rgba(255,215,0,0.0)); }
+  50% { transform: translateY(-2px) scale(1.05); filter: drop-shadow(0 0 4px rgba(255,215,0,0.6)); }
+  100% { transform: translateY(0) scale(1); filter: drop-shadow(0 0 0px rgba(255,215,0,0.0)); }
+}
+
+/* 카드 공통 */
+.card {
+  border-radius: 16px;
+  padding: 16px 18px;
+  margin: 8px 0;
+  border: 1px solid rgba(0,0,0,0.06);
+  box-shadow: 0 10px 20px rgba(0,0,0,0.06);
+  transition: transform .15s ease, box-shadow .15s ease;
+  background: rgba(255,255,255,0.72);
+  backdrop-filter: blur(6px);
+}
+.card:hover {
+  transform: translateY(-3px);
+  box-shadow: 0 16px 28px rgba(0,0,0,0.08);
+}
+.badge {
+  display:inline-block; font-size:12px; padding:2px 8px; border-radius:999px;
+  background:#f0f5ff; color:#1d39c4; border:1px solid #adc6ff; margin-right:6px;
+}
+
+/* 섹션 타이틀 밑줄 */
+.section-title {
+  font-weight: 800; font-size: 1.15rem; margin: 6px 0 10px 0;
+  border-left: 6px solid #ffd666; padding-left: 10px;
+}
+
+/* 체크리스트 이쁜 불릿 */
+ul.pretty > li {
+  margin: 6px 0;
+}
+ul.pretty > li::marker {
+  content: "✅ ";
+}
+""") + "</style>"
+
+# -----------------------------
+# 3) 카드 템플릿 (import 때 한 번 렌더링)
+# -----------------------------
+def list_card(title, items):
+    """제목 + 체크리스트 카드 HTML"""
+    lis = "".join(f"<li>{x}</li>" for x in items)
+    return f"""
+<div class="card">
+  <div class="section-title">{title}</div>
+  <ul class="pretty">
+{lis}
+  </ul>
+</div>
+"""
+
+# 사용자 값과 무관한 카드
+CARDS = {
+    "recipe": list_card("🔥 집중 레시피", [
+        "포모도로 4세트(2시간) 1라운드",
+        "라운드마다 핵심 1문장 요약",
+        "끝에 10분 오답·메모 정리",
+    ]),
+    "focus": list_card("🧠 집중 유지 스킬", BASE_TIPS["focus"]),
+    "tools": list_card("🛠️ 도구/템 세팅", BASE_TIPS["tools"]),
+    "pitfalls": list_card("⚠️ 나의 함정 피하기", BASE_TIPS["pitfalls"]),
+    "mini_habits": list_card("🌱 7일 미니 습관 플랜", BASE_TIPS["mini_habits"]),
+    "environment": list_card("🎵 추천 집중 환경", [
+        "리듬 낮은 음악(로파이/화이트노이즈)",
+        "스탠딩 1세트 + 좌식 2세트 번갈아",
+        "휴대폰은 다른 방, 알림 전체 OFF",
+    ]),
+}
+
+# 유형별 카드 (16개 + 기본값)
+BEST_CARDS = {m: list_card("💡 핵심 학습 메커닉", CUSTOM_TIPS[m]["best"]) for m in MBTIS}
+DEFAULT_BEST_CARD = list_card("💡 핵심 학습 메커닉", DEFAULT_TIPS["best"])
+
+# 사용자 값 슬롯이 남은 템플릿: 유형별 부분은 미리 채우고 goal만 비워 둔다.
+# (슬로건에 중괄호가 들어가면 format 슬롯으로 오인되므로 이스케이프)
+_SUMMARY = """
+<div class="card">
+  <div class="badge">{mbti}</div>
+  <div class="badge">Study Fit</div>
+  <div style="font-size:20px; font-weight:700; margin-top:4px;">{slogan}</div>
+  <div style="margin-top:6px;">이번 주 목표: <b>{{goal}}</b></div>
+</div>
+"""
+SUMMARY_CARDS = {
+    m: _SUMMARY.format(mbti=m, slogan=spec["slogan"].replace("{", "{{").replace("}", "}}"))
+    for m, spec in CUSTOM_TIPS.items()
+}
+
+TIME_CARD = """
+<div class="card">
+  <div class="section-title">⏳ 하루 시간 설계</div>
+  <ul class="pretty">
+    <li>총 {hours:.1f}h = 25/5 x {sets}세트</li>
+    <li>세트 2~3개마다 10분 산책/스트레칭</li>
+  </ul>
+</div>
+"""
+
+def pomodoro_sets(hours):
+    """하루 공부 시간(시간) → 25/5 포모도로 세트 수"""
+    return int(hours * 60 / 30)
+
+def best_card(mbti, spec=None):
+    if isinstance(mbti, str) and mbti in BEST_CARDS:
+        return BEST_CARDS[mbti]
+    spec = spec or tips_for(mbti)[1]
+    return DEFAULT_BEST_CARD if spec is DEFAULT_TIPS else list_card("💡 핵심 학습 메커닉", spec["best"])
+
+def summary_card(mbti, goal, spec=None):
+    """상단 요약 카드 — goal만 HTML 이스케이프해서 끼워 넣는다"""
+    template = SUMMARY_CARDS.get(mbti)
+    if template is None:
+        slogan = (spec or tips_for(mbti)[1])["slogan"]
+        template = _SUMMARY.format(mbti=html.escape(str(mbti)), slogan=html.escape(slogan).replace("{", "{{").replace("}", "}}"))
+    return template.format(goal=html.escape(goal) if goal else "목표를 입력해보세요")
+
+def time_card(hours):
+    return TIME_CARD.format(hours=hours, sets=pomodoro_sets(hours))
+
+# -----------------------------
+# 3-1) 포모도로 타이머 (상태 = 시작 시각뿐, 남은 시간은 매번 계산)
+# -----------------------------
+FOCUS_SEC = 25 * 60
+BREAK_SEC = 5 * 60
+
+def pomodoro_phase(elapsed, sets):
+    """경과 초 → (세트 번호(1부터), 'focus'|'break'|'done', 현재 구간 남은 초)"""
+    cycle = FOCUS_SEC + BREAK_SEC
+    if elapsed >= sets * cycle:
+        return sets, "done", 0
+    index, into = divmod(int(elapsed), cycle)
+    if into < FOCUS_SEC:
+        return index + 1, "focus", FOCUS_SEC - into
+    return index + 1, "break", cycle - into
+
+# -----------------------------
+# 4) Markdown 플랜
+# -----------------------------
+def bullets(items):
+    return "\n".join("- " + x for x in items)
+
+# 공통 섹션은 유형과 무관하므로 한 번만 만든다
+_BASE_SECTIONS = f"""## 집중 유지 스킬
+{bullets(BASE_TIPS['focus'])}
+
+## 도구/템 세팅
+{bullets(BASE_TIPS['tools'])}
+
+## 나의 함정 피하기
+{bullets(BASE_TIPS['pitfalls'])}
+
+## 7일 미니 습관 플랜
+{bullets(BASE_TIPS['mini_habits'])}"""
+
+def plan_text(mbti, goal, hours, generated=None, spec=None):
+    """다운로드용 맞춤 플랜 Markdown. generated: 'YYYY-MM-DD HH:MM' (생략하면 현재 시각)"""
+    spec = spec or tips_for(mbti)[1]
+    generated = generated or datetime.now().strftime("%Y-%m-%d %H:%M")
+    return f"""# MBTI Study Coach - {mbti}
+- 생성 시각: {generated}
+- 이번 주 목표: {goal if goal else '미입력'}
+- 하루 공부 가능 시간: {hours:.1f}시간
+
+## 슬로건
+{spec['slogan']}
+
+## 핵심 학습 메커닉
+{bullets(spec['best'])}
+
+{_BASE_SECTIONS}
+
+## 3줄 요약
+1) {mbti} 타입에 맞춘 전략으로 시작(완벽주의 금지, 작은 승리부터)
+2) 테스트 우선학습 + 오답 폐쇄루프
+3) 주 1회 회고로 미세 조정"""
+
+# -----------------------------
+# 5) 반 전체 명단 → 플랜 ZIP
+# -----------------------------
+ROSTER_BATCH = 500        # 워커 한 번에 넘기는 학생 수
+ROSTER_INFLIGHT = 4       # 워커당 동시에 맡겨 둘 배치 수 (메모리 상한)
+DEFAULT_HOURS = 2.0
+
+ROSTER_COLUMNS = {
+    "name": {"name", "이름", "student", "학생"},
+    "mbti": {"mbti", "type", "유형"},
+    "goal": {"goal", "목표"},
+    "hours": {"hours", "hour", "시간", "공부시간"},
+}
+
+def roster_rows(lines):
+    """명단 CSV(문자열 줄 iterable) → (name, mbti, goal, hours) 제너레이터.
+    헤더 이름은 대소문자/한글 별칭을 허용하고, 시간이 비었거나 잘못되면 기본값 사용."""
+    reader = csv.reader(lines)
+    header = [h.strip().lstrip("\ufeff").lower() for h in next(reader, [])]
+    idx = {}
+    for key, names in ROSTER_COLUMNS.items():
+        idx[key] = next((i for i, h in enumerate(header) if h in names), None)
+    if idx["name"] is None or idx["mbti"] is None:
+        raise ValueError("명단 CSV에 name(이름)과 mbti 열이 필요합니다.")
+
+    def cell(row, key):
+        i = idx[key]
+        return row[i].strip() if i is not None and i < len(row) else ""
+
+    for row in reader:
+        if not any(c.strip() for c in row):
+            continue
+        try:
+            hours = float(cell(row, "hours") or DEFAULT_HOURS)
+        except ValueError:
+            hours = DEFAULT_HOURS
+        yield cell(row, "name"), cell(row, "mbti").upper(), cell(row, "goal"), min(max(hours, 0.0), 24.0)
+
+def safe_filename(text, default="student"):
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", text).strip("_") or default
+
+def render_batch(start, rows, generated):
+    """워커 프로세스: 학생 묶음 → [(ZIP 안 파일명, UTF-8 바이트)]"""
+    specs = specs_for([mbti for _, mbti, _, _ in rows])   # 부분 유형은 배치 한 번에 점수 계산
+    return [
+        (f"{start + i:05d}_{safe_filename(name)}_{safe_filename(mbti, 'NA')}.md",
+         plan_text(mbti, goal, hours, generated, spec).encode("utf-8"))
+        for i, ((name, mbti, goal, hours), spec) in enumerate(zip(rows, specs), 1)
+    ]
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_roster_zip(rows, out, pool=None, workers=None, batch=ROSTER_BATCH):
+    """학생 행 iterable → out(경로 또는 바이너리 파일 객체)에 ZIP 기록. 학생 수 반환.
+
+    배치를 프로세스 풀에 나눠 렌더링하고, 끝난 순서가 아니라 제출 순서대로 바로
+    ZIP에 쓴다. 한 번에 워커 수 x ROSTER_INFLIGHT 배치만 맡기므로 명단이 커져도
+    메모리에는 그만큼의 플랜만 머문다.
+    """
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    own = pool is None
+    if own:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    limit = max(1, (getattr(pool, "_max_workers", None) or os.cpu_count() or 1) * ROSTER_INFLIGHT)
+    total, pending = 0, []
+    try:
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            def drain(keep):
+                nonlocal total
+                while len(pending) > keep:
+                    for name, data in pending.pop(0).result():
+                        zf.writestr(name, data)
+                        total += 1
+
+            start = 0
+            for chunk in _batches(rows, batch):
+                pending.append(pool.submit(render_batch, start, chunk, generated))
+                start += len(chunk)
+                drain(limit)
+            drain(0)
+    finally:
+        if own:
+            pool.shutdown(cancel_futures=True)
+    return total
+
+# -----------------------------
+# 6) CLI
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="반 전체 명단 CSV → 학생별 MBTI 공부 플랜 ZIP")
+    parser.add_argument("roster", help="name, mbti, goal, hours 열이 있는 CSV ('-'이면 표준 입력)")
+    parser.add_argument("-o", "--output", default="study_plans.zip", help="ZIP 저장 경로")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--batch", type=int, default=ROSTER_BATCH, help="워커 작업 하나당 학생 수")
+    args = parser.parse_args(argv)
+
+    if args.roster == "-":
+        lines = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        lines = open(args.roster, encoding="utf-8-sig", newline="")
+    with lines:
+        try:
+            count = build_roster_zip(roster_rows(lines), args.output, workers=args.workers, batch=args.batch)
+        except ValueError as e:
+            parser.error(str(e))
+    print(f"{count:,}명 플랜 → {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# study_scheduler.py
+# ─────────────────────────────────────────────────────────────
+# 간격 반복(Spaced Repetition) 복습 스케줄러 (Streamlit 의존성 없음)
+#   - 카드마다 SM-2 방식 간격/난이도(ease)를 두고, 다음 복습일을 힙(우선순위 큐)에 보관
+#   - 하루 공부 시간(hours) → 포모도로 집중 시간 → 하루 복습 가능 카드 수
+#   - 복습 결과는 해당 카드만 힙에 다시 넣는다 (O(k log n), 전체 재구성 없음)
+#   - 여러 주 달력 미리보기, ICS/Markdown 내보내기
+# 사용 예:
+#   python study_scheduler.py cards.txt --hours 2 --weeks 4 --format ics -o review.ics
+# ─────────────────────────────────────────────────────────────
+import argparse
+import heapq
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import study_core as core
+
+MINUTES_PER_REVIEW = 2.0
+MIN_EASE = 1.3
+GRADES = {"again": 1, "hard": 3, "good": 4, "easy": 5}
+
+# -----------------------------
+# 1) 카드 상태
+# -----------------------------
+@dataclass
+class Card:
+    id: int
+    title: str
+    due: int              # 다음 복습일 (date.toordinal())
+    interval: int = 0     # 일
+    ease: float = 2.5
+    reps: int = 0
+    version: int = 0      # 힙 항목이 최신인지 확인용 (지연 삭제)
+
+def next_interval(interval, ease, reps, grade):
+    """SM-2: (간격, ease, 연속 성공 횟수) → 다음 (간격, ease, 연속 성공 횟수)"""
+    if grade < 3:
+        return 1, max(MIN_EASE, ease - 0.2), 0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if reps == 0:
+        interval = 1
+    elif reps == 1:
+        interval = 6
+    else:
+        interval = round(interval * ease)
+    return interval, ease, reps + 1
+
+def daily_capacity(hours, minutes_per_review=MINUTES_PER_REVIEW):
+    """하루 공부 시간 → 포모도로 집중 시간 안에 복습할 수 있는 카드 수"""
+    focus = core.pomodoro_sets(hours) * core.FOCUS_SEC / 60
+    return int(focus // minutes_per_review)
+
+# -----------------------------
+# 2) 스케줄러
+# -----------------------------
+class ReviewScheduler:
+    """복습일 기준 최소 힙. 힙 항목은 (due, id, version)이고,
+    카드가 다시 예약되면 version을 올려 이전 항목은 꺼낼 때 버린다."""
+
+    def __init__(self, titles=(), start=None):
+        start = (start or date.today()).toordinal()
+        self.cards = {}
+        self.heap = []
+        for title in titles:
+            self.add(title, start)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def add(self, title, due=None):
+        card = Card(len(self.cards), title, due or date.today().toordinal())
+        self.cards[card.id] = card
+        heapq.heappush(self.heap, (card.due, card.id, card.version))
+        return card
+
+    def _live(self, entry):
+        card = self.cards.get(entry[1])
+        return card is not None and card.version == entry[2]
+
+    def due(self, day=None, limit=None):
+        """day까지 복습할 카드를 복습일 순서로 (힙은 건드리지 않음)"""
+        day = (day or date.today()).toordinal()
+        out, heap = [], list(self.heap)        # 복사본도 유효한 힙
+        while heap and heap[0][0] <= day and (limit is None or len(out) < limit):
+            entry = heapq.heappop(heap)
+            if self._live(entry):
+                out.append(self.cards[entry[1]])
+        return out
+
+    def review(self, card_id, grade, day=None):
+        """복습 결과 반영 — 이 카드만 새 복습일로 다시 넣는다 (O(log n))"""
+        if isinstance(grade, str):
+            grade = GRADES[grade]
+        day = (day or date.today()).toordinal()
+        card = self.cards[card_id]
+        card.interval, card.ease, card.reps = next_interval(card.interval, card.ease, card.reps, grade)
+        card.due = day + card.interval
+        card.version += 1
+        heapq.heappush(self.heap, (card.due, card.id, card.version))
+        if len(self.heap) > 2 * len(self.cards):   # 지연 삭제로 쌓인 항목 정리
+            self.heap = [e for e in self.heap if self._live(e)]
+            heapq.heapify(self.heap)
+        return card
+
+    def plan(self, hours, days=28, start=None, minutes_per_review=MINUTES_PER_REVIEW):
+        """앞으로 days일 달력: [(날짜, [카드 제목...]), ...].
+
+        하루 용량만큼 밀린 순서대로 꺼내고, 모두 'good'으로 복습했다고 가정해
+        다음 복습일을 힙에 다시 넣는다. 넘친 카드는 다음 날로 밀린다.
+        실제 상태는 바꾸지 않는다. 비용은 힙 복사 O(n) + (일수 x 하루 용량) x O(log n).
+        """
+        start = start or date.today()
+        capacity = daily_capacity(hours, minutes_per_review)
+        heap = [(due, cid, self.cards[cid].interval, self.cards[cid].ease, self.cards[cid].reps)
+                for due, cid, version in self.heap if self.cards[cid].version == version]
+        heapq.heapify(heap)
+        calendar = []
+        for offset in range(days):
+            day = start.toordinal() + offset
+            titles = []
+            while heap and heap[0][0] <= day and len(titles) < capacity:
+                _, cid, interval, ease, reps = heapq.heappop(heap)
+                titles.append(self.cards[cid].title)
+                interval, ease, reps = next_interval(interval, ease, reps, GRADES["good"])
+                heapq.heappush(heap, (day + interval, cid, interval, ease, reps))
+            calendar.append((date.fromordinal(day), titles))
+        return calendar
+
+# -----------------------------
+# 3) 내보내기
+# -----------------------------
+def to_markdown(calendar, hours):
+    lines = [f"# 복습 캘린더 (하루 {hours:.1f}시간)", ""]
+    for day, titles in calendar:
+        if titles:
+            lines.append(f"## {day.isoformat()} ({len(titles)}장)")
+            lines.extend(f"- {t}" for t in titles)
+            lines.append("")
+    return "\n".join(lines)
+
+def _ics_text(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_fold(line, limit=75):
+    """RFC 5545 3.1: 75옥텟 넘는 줄은 CRLF + 공백으로 접는다 (UTF-8 글자 중간에서 자르지 않음)"""
+    if len(line.encode("utf-8")) <= limit:
+        return line
+    parts, cur, size = [], [], 0
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            parts.append("".join(cur))
+            cur, size, limit = [], 0, 74     # 이어지는 줄은 앞 공백 1옥텟 포함
+        cur.append(ch)
+        size += n
+    parts.append("".join(cur))
+    return "\r\n ".join(parts)
+
+def to_ics(calendar, hours, start_time="19:00"):
+    """하루 한 개 VEVENT (복습 카드 목록은 DESCRIPTION)"""
+    hh, mm = map(int, start_time.split(":"))
+    minutes = core.pomodoro_sets(hours) * 30 or 30
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//MBTI Study Coach//Review//KO", "CALSCALE:GREGORIAN"]
+    for day, titles in calendar:
+        if not titles:
+            continue
+        begin = datetime(day.year, day.month, day.day, hh, mm)
+        end = begin + timedelta(minutes=minutes)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:review-{day.isoformat()}@mbti-study-coach",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{begin.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_ics_text(f'📚 복습 {len(titles)}장')}",
+            f"DESCRIPTION:{_ics_text(chr(10).join(titles))}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(map(_ics_fold, lines)) + "\r\n"
+
+# -----------------------------
+# 4) CLI
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="복습 카드 목록 → 간격 반복 복습 캘린더")
+    parser.add_argument("cards", help="한 줄에 카드 하나인 텍스트 파일 ('-'이면 표준 입력)")
+    parser.add_argument("--hours", type=float, default=2.0, help="하루 공부 가능 시간")
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--format", choices=["md", "ics"], default="md")
+    parser.add_argument("-o", "--output", help="저장 경로 (생략하면 표준 출력)")
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.cards == "-" else open(args.cards, encoding="utf-8")
+    with f:
+        titles = [line.strip() for line in f if line.strip()]
+    calendar = ReviewScheduler(titles).plan(args.hours, days=args.weeks * 7)
+    text = to_ics(calendar, args.hours) if args.format == "ics" else to_markdown(calendar, args.hours)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            out.write(text)
+    else:
+        sys.stdout.write(text)
+
+if __name__ == "__main__":
+    main()
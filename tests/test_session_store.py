@@ -0,0 +1,19 @@
+from session_store import SessionStore
+
+class MemoryBackend:
+    def __init__(self):
+        self.rows = {}
+
+    def load(self, sid):
+        return None
+
+    def save_many(self, rows):
+        self.rows.update({sid: data for sid, data, _ in rows})
+
+def test_cache_shrinks_once_updates_are_written():
+    store = SessionStore(MemoryBackend(), max_sessions=5, interval=0.01)
+    for i in range(20):
+        store.update(f"s{i}", v=i)   # get() 캐시 미스 없이 update만 반복
+    assert store.flush(5)
+    assert len(store) <= 5 and not store.dirty
+    store.close()
@@ -0,0 +1,19 @@
+import numpy as np
+
+import mbti_core as core
+
+def test_query_rows_point_at_duplicate_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shares = np.eye(len(core.MBTI_TYPES))[:3] * 100
+    shares[1, 2] = 50   # 두 번째 Korea 행만 Japan과 겹친다
+    lines = ["Country," + ",".join(core.MBTI_TYPES)]
+    for name, values in zip(["Korea", "Korea", "Japan"], shares):
+        lines.append(name + "," + ",".join(map(str, values)))
+    path = tmp_path / "mbti.csv"
+    path.write_text("\n".join(lines) + "\n")
+
+    ds = core.load_dataset(str(path))
+    index = core.SimilarityIndex(ds)
+    rows, value = index.query(2, 1, "cosine")   # Japan과 가장 비슷한 행
+    assert list(index.frame(rows, value)["Country"]) == ["Korea"]
+    assert rows[0] == 1 != index.row_of("Korea")   # 이름으로 찾으면 첫 번째 Korea(0행)가 나온다
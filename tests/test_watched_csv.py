@@ -0,0 +1,38 @@
+import mbti_core as core
+
+HEADER = "Country," + ",".join(core.MBTI_TYPES) + "\n"
+
+def row(name, value):
+    return name + "," + ",".join([str(value)] * len(core.MBTI_TYPES)) + "\n"
+
+def test_malformed_tail_row_does_not_break_refresh(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # .mbti_cache는 임시 폴더에
+    path = tmp_path / "mbti.csv"
+    path.write_text(HEADER + row("Korea", 6.25) + row("Japan", 6.25))
+    watched = core.WatchedCSV(str(path))
+    assert len(watched.refresh().country) == 2
+
+    with open(path, "a") as f:
+        f.write("France,40\n")            # 짧은 줄: 예전에는 refresh()가 매번 ValueError
+    ds = watched.refresh()
+    assert list(ds.country)[-1] == "France"
+
+    with open(path, "a") as f:
+        f.write(row("Spain", 7.5))        # 이후 정상 줄은 계속 증분 반영
+    ds = watched.refresh()
+    assert list(ds.country)[-1] == "Spain"
+    assert ds.top("INTJ", 1)["Country"].iloc[0] == "France"   # 짧은 줄의 첫 유형 값(40)은 반영
+    assert ds.top("ESFP", 1)["Country"].iloc[0] == "Spain"    # 나머지는 빈칸
+
+def test_rebuild_removes_previous_feather(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "mbti.csv"
+    path.write_text(HEADER + row("Korea", 6.25))
+    watched = core.WatchedCSV(str(path))
+    watched.refresh()
+    first = core.cache_path(path.read_bytes())
+
+    path.write_text(HEADER + row("Japan", 6.25))   # 중간이 바뀜 → 전체 재구성
+    assert list(watched.refresh().country) == ["Japan"]
+    assert not (tmp_path / first).exists()
+    assert (tmp_path / core.cache_path(path.read_bytes())).exists()
@@ -11,13 +11,19 @@
 #  - 반드시 사람이 배에 타 있어야 '이동' 가능
 # ─────────────────────────────────────────────────────────────
 
+import time
+
 import streamlit as st
 
+import river_engine as engine
+import river_solver as solver
+import river_telemetry as tm
+from css_util import minify_css
+
 st.set_page_config(page_title="강 건너기 퍼즐 🐺🐑🥬", page_icon="⛵", layout="wide")
 
 # ---------------- 스타일 ----------------
-st.markdown("""
-<style>
+STYLE_CSS = """
 .stApp { 
   background: radial-gradient(1200px 600px at 20% 10%, #fff7e6 0%, transparent 60%),
               radial-gradient(1200px 600px at 80% 20%, #e6f7ff 0%, transparent 60%),
@@ -39,121 +45,191 @@ st.markdown("""
              border:2px dashed #91caff; background:#e6f4ffaa;}
 .disabled { opacity: .5; pointer-events:none; }
 hr.sep { border:none; border-top:1px dashed #d9d9d9; margin:10px 0; }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+# ---------------- 기록 ----------------
+@st.cache_resource
+def telemetry():
+    """프로세스 공용 기록 저장소 (write-behind 큐 + SQLite)"""
+    return tm.Telemetry()
+
+def log_action(action=None, nav=None):
+    """엔진 행동(action) 또는 되돌리기/다시 하기(nav) 하나를 큐에 넣고,
+    판이 끝났으면 결과도 넣는다 (디스크는 백그라운드 스레드가)"""
+    game, run = st.session_state.game, st.session_state.run
+    now = time.time()
+    run["started"] = run["started"] or now
+    run["seq"] += 1
+    if nav:
+        telemetry().navigate(run["id"], run["seq"], nav, game.state, now)
+    else:
+        telemetry().move(run["id"], run["seq"], action, game.state, now)
+    if game.status != engine.PLAYING and not run["done"]:
+        run["done"] = True
+        telemetry().finish(run["id"], game.status, game.moves, run["seq"], now - run["started"],
+                           game.history(), st.session_state.get("player"), now)
+
+def close_run():
+    """끝내지 않은 채 초기화하는 판도 '중간에 그만둠'으로 남긴다"""
+    run = st.session_state.get("run")
+    if run and run["seq"] and not run["done"]:
+        game = st.session_state.game
+        telemetry().finish(run["id"], tm.ABANDONED, game.moves, run["seq"], time.time() - run["started"],
+                           game.history(), st.session_state.get("player"))
 
 # ---------------- 상태 ----------------
+# 게임 상태는 river_engine의 상태 정수 + 행동 기록 하나뿐 (위치/보트/판정은 표 조회로 계산)
 def reset_game():
-    st.session_state.positions = {  # 'L'eft or 'R'ight
-        "person": "L",
-        "wolf":   "L",
-        "goat":   "L",
-        "cabbage":"L",
-    }
-    st.session_state.boat_side = "L"     # 'L' or 'R'
-    st.session_state.boat_load = None    # None or one of ['wolf','goat','cabbage']
-    st.session_state.running = True
-    st.session_state.result = None       # 'win' | 'lose' | None
+    close_run()
+    st.session_state.game = engine.RiverGame()
+    st.session_state.run = {"id": tm.Telemetry.new_game(), "seq": 0, "started": None, "done": False}
     st.session_state.view = "menu"       # 'menu' | 'game'
+    st.session_state.notices = []        # 콜백이 남긴 (메시지, 아이콘, 효과) → 프래그먼트에서 표시
 
-if "positions" not in st.session_state:
+if "game" not in st.session_state:
     reset_game()
 
+def state():
+    return st.session_state.game.state
+
+def running():
+    return st.session_state.game.status == engine.PLAYING
+
+def result():
+    """('win' | 'lose', 메시지) 또는 None"""
+    status = st.session_state.game.status
+    if status == engine.PLAYING:
+        return None
+    return ("win" if status == engine.WON else "lose"), engine.MESSAGES[status]
+
 EMOJI = {"person":"🧍", "wolf":"🐺", "goat":"🐑", "cabbage":"🥬"}
 LABEL = {"person":"사람", "wolf":"늑대", "goat":"양", "cabbage":"양배추"}
 
-# ---------------- 규칙 체크 ----------------
-def check_fail():
-    """사람이 없는 둑에서 금지 조합이 있으면 실패 반환."""
-    pos = st.session_state.positions
-    for side in ("L","R"):
-        person_here = (pos["person"] == side)
-        # 늑대+양
-        if (pos["wolf"] == side) and (pos["goat"] == side) and (not person_here):
-            return "늑대가 양을 먹어버렸어요! 🐺➡️🐑"
-        # 양+양배추
-        if (pos["goat"] == side) and (pos["cabbage"] == side) and (not person_here):
-            return "양이 양배추를 먹어버렸어요! 🐑➡️🥬"
-    return None
-
-def check_win():
-    pos = st.session_state.positions
-    return all(pos[k] == "R" for k in pos)
-
-# ---------------- 보트 조작 ----------------
-def can_board(name):
-    """해당 객체를 보트에 태울 수 있는지: 보트와 같은 둑에 있고, 빈 자리(사람은 항상 탑승)"""
-    if name == "person":
-        # 사람은 별도 슬롯: 배가 있는 둑에 사람 있어야 '이동' 가능
-        return st.session_state.positions["person"] == st.session_state.boat_side
-    else:
-        return (st.session_state.positions[name] == st.session_state.boat_side) and (st.session_state.boat_load in (None, name))
+# ---------------- HTML 템플릿 (프로세스당 한 번 렌더링) ----------------
+ITEM_CARD = """
+<div class="{cl}">
+  <div class="left">
+    <span style="font-size:22px">{emoji}</span>
+    <div><b>{label}</b><br><span style="font-size:12px; color:#666">위치: {where}</span></div>
+  </div>
+  <div>
+    {badge}
+  </div>
+</div>
+"""
+
+BOAT_ZONE = """
+<div class="boat-zone">
+  <div style="font-size:18px">{boat_desc}</div>
+  <div style="margin-top:4px">{load_desc}</div>
+  <div style="font-size:13px; color:#666; margin-top:6px">
+    * 사람은 보트 이동 시 자동 탑승(보트와 같은 둑에 있어야 함)
+  </div>
+</div>
+"""
+
+@st.cache_resource
+def ui_templates():
+    """압축한 <style>과 카드/보트 HTML 전체 조합을 미리 만들어 모든 세션이 공유.
+    카드: (객체, 보트 옆 여부, 탑승 중 여부, 비활성 여부) 32가지 / 보트: (둑, 탑승객) 8가지
+    """
+    cards = {
+        (name, on_boat_side, is_load, disabled): ITEM_CARD.format(
+            cl="card" + (" disabled" if disabled else ""),
+            emoji=EMOJI[name],
+            label=LABEL[name],
+            where="보트 옆" if on_boat_side else "반대 둑",
+            badge="<span class='badge'>보트 탑승 중</span>" if is_load else "",
+        )
+        for name in EMOJI for on_boat_side in (True, False)
+        for is_load in (True, False) for disabled in (True, False)
+    }
+    boats = {
+        (side, load): BOAT_ZONE.format(
+            boat_desc=f"⛵ 보트 위치: {'왼쪽 둑' if side=='L' else '오른쪽 둑'}",
+            load_desc=f"탑승객: {LABEL[load]} {EMOJI[load]}" if load else "탑승객: (없음)",
+        )
+        for side in ("L", "R") for load in (None, "wolf", "goat", "cabbage")
+    }
+    return {"style": f"<style>{minify_css(STYLE_CSS)}</style>", "cards": cards, "boats": boats}
+
+TPL = ui_templates()
+st.markdown(TPL["style"], unsafe_allow_html=True)
+
+# ---------------- 보트 조작 (모두 on_click 콜백) ----------------
+# 콜백은 화면을 그리기 전에 실행되므로 같은 실행에서 바로 새 상태가 그려진다.
+# 토스트·풍선 같은 효과는 콜백에서 직접 띄우지 않고 notices에 남겨 프래그먼트 안에서 표시.
+def notify(msg, icon, effect=None):
+    st.session_state.notices.append((msg, icon, effect))
+
+def show_notices():
+    for msg, icon, effect in st.session_state.notices:
+        if effect:
+            getattr(st, effect)()
+        st.toast(msg, icon=icon)
+    st.session_state.notices = []
 
 def toggle_board(name):
     """객체 보트 탑승/하차 토글"""
-    if not can_board(name): 
-        st.toast("그 객체는 지금 보트에 태울 수 없어요.", icon="🛶")
-        return
     if name == "person":
         # 사람은 탑승/하차 개념 없이 항상 둑에 있고, 이동 시 함께 이동
-        st.toast("사람은 배 이동에 자동으로 탑니다. (보트와 같은 둑에만 있으면 돼요)", icon="🧍")
+        notify("사람은 배 이동에 자동으로 탑니다. (보트와 같은 둑에만 있으면 돼요)", "🧍")
         return
-    # 승객 슬롯 토글
-    if st.session_state.boat_load == name:
-        st.session_state.boat_load = None
-    else:
-        st.session_state.boat_load = name
+    if not st.session_state.game.act(name):
+        notify("그 객체는 지금 보트에 태울 수 없어요.", "🛶")
+        return
+    log_action(name)
 
 def move_boat():
-    """보트 이동(좌<->우). 조건: 사람이 보트와 같은 둑에 있어야 함."""
-    if st.session_state.positions["person"] != st.session_state.boat_side:
-        st.toast("사람이 보트에 타 있어야 움직일 수 있어요! 🧍⛵", icon="⛔")
+    """보트 이동(좌<->우). 사람·승객이 함께 건너고, 도착하면 승객은 자동 하선."""
+    game = st.session_state.game
+    if not game.act(engine.MOVE):
         return
-    # 이동 수행: 사람과 보트, 그리고 승객(있다면) 위치 반대쪽으로
-    new_side = "R" if st.session_state.boat_side == "L" else "L"
-    st.session_state.boat_side = new_side
-    st.session_state.positions["person"] = new_side
-    if st.session_state.boat_load:
-        st.session_state.positions[st.session_state.boat_load] = new_side
-        # 도착하면 자동 하선
-        st.session_state.boat_load = None
-
-    # 상태 판정
-    fail_reason = check_fail()
-    if fail_reason:
-        st.session_state.result = ("lose", fail_reason)
-        st.session_state.running = False
-        st.snow()
-        st.toast("실패! 다시 도전해보세요.", icon="💥")
-    elif check_win():
-        st.session_state.result = ("win", "모두 무사히 건넜습니다! 🎉")
-        st.session_state.running = False
-        st.balloons()
-        st.toast("성공!", icon="🏆")
+    log_action("move")
+    if game.status == engine.WON:
+        notify("성공!", "🏆", "balloons")
+    elif game.status != engine.PLAYING:
+        notify("실패! 다시 도전해보세요.", "💥", "snow")
+
+def undo():
+    # 끝난 판은 결과가 확정 — 되돌려서 다시 이기는 판이 기록과 어긋나지 않게 막는다
+    if not running():
+        return
+    st.session_state.game.undo()
+    log_action(nav="undo")
+
+def redo():
+    st.session_state.game.redo()
+    log_action(nav="redo")
+
+def start_game():
+    st.session_state.player = st.session_state.get("player_input", "").strip()
+    reset_game()
+    st.session_state.view = "game"
+    notify("게임 시작!", "🎯", "balloons")
+
+def restart_game():
+    reset_game()
+    st.session_state.view = "game"
+
+def go_menu():
+    st.session_state.view = "menu"
 
 # ---------------- 공통 UI 위젯 ----------------
 def item_card(name, side):
-    here = (st.session_state.positions[name] == side)
-    on_boat_side = (st.session_state.boat_side == side)
-    is_load = (st.session_state.boat_load == name)
-    disabled = not (here and on_boat_side and (name=="person" or st.session_state.boat_load in (None, name)))
+    cur = state()
+    on_boat_side = (engine.boat_side(cur) == side)
+    is_load = (engine.load(cur) == name)
+    if name == "person":
+        disabled = not (running() and on_boat_side)
+    else:
+        disabled = not engine.can_board(cur, name)
 
     with st.container():
-        cl = "card" + (" disabled" if disabled else "")
-        st.markdown(f"""
-<div class="{cl}">
-  <div class="left">
-    <span style="font-size:22px">{EMOJI[name]}</span>
-    <div><b>{LABEL[name]}</b><br><span style="font-size:12px; color:#666">위치: {'보트 옆' if on_boat_side else '반대 둑'}</span></div>
-  </div>
-  <div>
-    {"<span class='badge'>보트 탑승 중</span>" if is_load else ""}
-  </div>
-</div>
-""", unsafe_allow_html=True)
+        st.markdown(TPL["cards"][(name, on_boat_side, is_load, disabled)], unsafe_allow_html=True)
         btn_label = "보트에 태우기" if not is_load else "보트에서 내리기"
-        if st.button(btn_label, key=f"btn-{name}-{side}", disabled=disabled, use_container_width=True):
-            toggle_board(name)
+        st.button(btn_label, key=f"btn-{name}-{side}", disabled=disabled, use_container_width=True,
+                  on_click=toggle_board, args=(name,))
 
 def river_scene():
     # 좌/강/우 3단 레이아웃
@@ -164,7 +240,7 @@ def river_scene():
         st.markdown("<div class='section'>", unsafe_allow_html=True)
         st.markdown("<div class='bank-title'>🌿 왼쪽 둑</div>", unsafe_allow_html=True)
         for k in ["person","wolf","goat","cabbage"]:
-            if st.session_state.positions[k] == "L":
+            if engine.side(state(), k) == "L":
                 item_card(k, "L")
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -173,26 +249,16 @@ def river_scene():
         st.markdown("<div class='section'>", unsafe_allow_html=True)
         st.markdown("<div class='bank-title'>🌊 강 가운데</div>", unsafe_allow_html=True)
         # 보트 상태
-        boat_desc = f"⛵ 보트 위치: {'왼쪽 둑' if st.session_state.boat_side=='L' else '오른쪽 둑'}"
-        load_desc = f"탑승객: {LABEL[st.session_state.boat_load]} {EMOJI[st.session_state.boat_load]}" if st.session_state.boat_load else "탑승객: (없음)"
-        st.markdown(f"""
-<div class="boat-zone">
-  <div style="font-size:18px">{boat_desc}</div>
-  <div style="margin-top:4px">{load_desc}</div>
-  <div style="font-size:13px; color:#666; margin-top:6px">
-    * 사람은 보트 이동 시 자동 탑승(보트와 같은 둑에 있어야 함)
-  </div>
-</div>
-""", unsafe_allow_html=True)
+        st.markdown(TPL["boats"][(engine.boat_side(state()), engine.load(state()))], unsafe_allow_html=True)
 
         st.markdown("<hr class='sep'/>", unsafe_allow_html=True)
         cols = st.columns(3)
         with cols[0]:
-            st.button("⬅️ 왼쪽으로", use_container_width=True, on_click=move_boat, disabled=not(st.session_state.running and st.session_state.boat_side=="R"))
+            st.button("⬅️ 왼쪽으로", use_container_width=True, on_click=move_boat, disabled=not(running() and engine.boat_side(state())=="R"))
         with cols[1]:
-            st.button("⛵ 이동", type="primary", use_container_width=True, on_click=move_boot if False else move_boat, disabled=not st.session_state.running)
+            st.button("⛵ 이동", type="primary", use_container_width=True, on_click=move_boat, disabled=not running())
         with cols[2]:
-            st.button("➡️ 오른쪽으로", use_container_width=True, on_click=move_boat, disabled=not(st.session_state.running and st.session_state.boat_side=="L"))
+            st.button("➡️ 오른쪽으로", use_container_width=True, on_click=move_boat, disabled=not(running() and engine.boat_side(state())=="L"))
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -201,7 +267,7 @@ def river_scene():
         st.markdown("<div class='section'>", unsafe_allow_html=True)
         st.markdown("<div class='bank-title'>🏞️ 오른쪽 둑</div>", unsafe_allow_html=True)
         for k in ["person","wolf","goat","cabbage"]:
-            if st.session_state.positions[k] == "R":
+            if engine.side(state(), k) == "R":
                 item_card(k, "R")
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -221,45 +287,88 @@ def menu_screen():
 - **객체 카드를 클릭**해 보트에 태우거나 내릴 수 있어요.  
 - **사람은 보트와 같은 둑에 있어야** 배가 이동합니다.
 """)
+        leaderboard_view()
     with c2:
         st.markdown("### ")
-        if st.button("🚀 게임 실행", type="primary", use_container_width=True):
-            reset_game()
-            st.session_state.view = "game"
-            st.toast("게임 시작!", icon="🎯")
-            st.balloons()
+        st.text_input("닉네임 (순위표에 표시)", value=st.session_state.get("player", ""), key="player_input",
+                      max_chars=20, placeholder="익명")
+        st.button("🚀 게임 실행", type="primary", use_container_width=True, on_click=start_game)
+
+# ---------------- 순위표 ----------------
+@st.cache_data(ttl=5)
+def leaderboard(by):
+    return telemetry().leaderboard(10, by)
+
+@st.cache_data(ttl=5)
+def game_stats():
+    return telemetry().stats()
+
+def leaderboard_view():
+    """집계표·인덱스만 읽는 작은 조회라 5초 캐시로 충분"""
+    with st.expander("🏆 순위표 · 통계", expanded=False):
+        stats = game_stats()
+        if not stats["games"]:
+            st.caption("아직 기록된 게임이 없어요.")
+            return
+        won = stats["outcomes"].get(engine.WON, (0, 0, 0))[0]
+        m1, m2, m3 = st.columns(3)
+        m1.metric("전체 판", f"{stats['games']:,}")
+        m2.metric("성공률", f"{won / stats['games']:.0%}")
+        if stats["top_failure"] is not None:
+            m3.metric("가장 흔한 실패", tm.OUTCOME_NAMES[stats["top_failure"]])
+        for by, title in (("moves", "최소 이동"), ("seconds", "최단 시간")):
+            rows = leaderboard(by)
+            if rows:
+                st.markdown(f"**{title}**")
+                st.dataframe(
+                    [{"순위": i, "닉네임": p or "익명", "이동": m, "시간(초)": round(s, 1)}
+                     for i, (p, m, s, _) in enumerate(rows, 1)],
+                    hide_index=True, use_container_width=True,
+                )
 
 # ---------------- 게임 화면 ----------------
-def game_screen():
-    st.markdown("### 🚣 게임 화면")
+@st.fragment
+def play_area():
+    """둑·보트·기록·힌트·결과. 이 안의 버튼은 프래그먼트만 다시 실행한다
+    (제목·<style>·메뉴 버튼은 다시 보내지 않음)."""
+    show_notices()
     river_scene()
 
-    st.markdown("---")
-    cols = st.columns([1,1,1,1])
-    with cols[0]:
-        if st.button("↩️ 초기화", use_container_width=True):
-            reset_game()
-            st.session_state.view = "game"
-    with cols[1]:
-        if st.button("📜 규칙 보기", use_container_width=True):
-            st.info("사람+1개만 탑승 / 사람이 없는 둑에서 (늑대,양) 또는 (양,양배추) 함께 있으면 실패")
-    with cols[2]:
-        if st.button("🏠 메인으로", use_container_width=True):
-            st.session_state.view = "menu"
-    with cols[3]:
-        st.empty()
+    game = st.session_state.game
+    c1, c2, c3 = st.columns([1, 1, 2])
+    c1.button("⏪", help="되돌리기", on_click=undo, disabled=not (running() and game.can_undo()), use_container_width=True)
+    c2.button("⏩", help="다시 하기", on_click=redo, disabled=not game.can_redo(), use_container_width=True)
+    c3.caption(f"보트 이동 {game.moves}회")
+    if running() and st.toggle("💡 힌트", key="show_hint"):
+        # 거리 표는 import 때가 아니라 처음 힌트를 볼 때 한 번 계산되고 이후 조회만
+        left, loads = solver.CLASSIC.hint(solver.from_engine(state()))
+        if left > 0:
+            nxt = " 또는 ".join("+".join(LABEL[n] for n in load) or "빈 보트" for load in loads)
+            st.info(f"최적 풀이까지 보트 이동 {left}회 남음 — 다음에 태울 것: {nxt}")
 
-    if st.session_state.result:
-        kind, msg = st.session_state.result
+    if result():
+        kind, msg = result()
         if kind == "win":
             st.success(f"🏆 성공! {msg}")
         else:
             st.error(f"❌ 실패! {msg}")
         r1, r2 = st.columns([1,3])
         with r1:
-            if st.button("🔁 리플레이", type="primary", use_container_width=True):
-                reset_game()
-                st.session_state.view = "game"
+            st.button("🔁 리플레이", type="primary", use_container_width=True, on_click=restart_game)
+
+def game_screen():
+    st.markdown("### 🚣 게임 화면")
+    play_area()
+
+    st.markdown("---")
+    cols = st.columns([1,1,1])
+    with cols[0]:
+        st.button("↩️ 초기화", use_container_width=True, on_click=restart_game)
+    with cols[1]:
+        if st.button("📜 규칙 보기", use_container_width=True):
+            st.info("사람+1개만 탑승 / 사람이 없는 둑에서 (늑대,양) 또는 (양,양배추) 함께 있으면 실패")
+    with cols[2]:
+        st.button("🏠 메인으로", use_container_width=True, on_click=go_menu)
 
 # ---------------- 라우팅 ----------------
 st.markdown("<span class='title-chip'>Wolf-Goat-Cabbage</span>", unsafe_allow_html=True)
@@ -0,0 +1,135 @@
+# writebehind.py
+# ─────────────────────────────────────────────────────────────
+# 쓰기 지연(write-behind) 큐 (Streamlit 의존성 없음)
+#   - submit()은 메모리 버퍼에 넣고 바로 반환 (호출 스레드는 디스크 I/O를 기다리지 않음)
+#   - 백그라운드 스레드 하나가 max_batch개가 모이거나 interval초가 지나면 한 번에 기록
+#   - flush()로 지금까지 넣은 항목이 기록될 때까지 대기, 종료 시 자동 flush
+#   - 기록이 실패한 묶음은 버퍼 앞으로 되돌려 지수 백오프로 재시도하고,
+#     max_retries번 연속 실패하면 버린다 (on_drop으로 알림, flush()는 False)
+# ─────────────────────────────────────────────────────────────
+import atexit
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+class WriteBehind:
+    """write_batch(items: list)를 백그라운드에서 묶음 단위로 호출하는 큐.
+
+    key_of가 주어지면 아직 기록되지 않은 항목 중 같은 키는 마지막 값만 남긴다
+    (세션 스냅숏처럼 최신 상태만 의미 있는 경우).
+    """
+
+    def __init__(self, write_batch, max_batch=500, interval=0.5, key_of=None, name="write-behind",
+                 max_retries=5, max_backoff=30.0, on_drop=None):
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.interval = interval
+        self.key_of = key_of
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.on_drop = on_drop   # on_drop(items): 재시도를 포기한 항목
+        self.pending = {} if key_of else []
+        self.cond = threading.Condition()
+        self.submitted = 0       # submit() 횟수
+        self.written = 0         # 기록을 마친 submit() 횟수 (합쳐진 항목 포함, 실패분 제외)
+        self.failures = 0        # 연속 실패 횟수 (0이 아니면 백오프 중)
+        self.dropped = 0         # 재시도를 포기한 항목 수
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item):
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("이미 닫힌 write-behind 큐입니다.")
+            if self.key_of:
+                self.pending[self.key_of(item)] = item
+            else:
+                self.pending.append(item)
+            self.submitted += 1
+            if len(self.pending) >= self.max_batch:
+                self.cond.notify_all()
+
+    def _take(self):
+        """버퍼를 통째로 꺼낸다 → (항목 목록, 그 사이 submit 횟수)"""
+        items = list(self.pending.values()) if self.key_of else self.pending
+        self.pending = {} if self.key_of else []
+        return items, self.submitted
+
+    def _requeue(self, items):
+        """실패한 항목을 버퍼 앞으로 되돌린다. 그 사이 같은 키로 새 값이 들어왔으면 새 값이 이긴다."""
+        if self.key_of:
+            merged = {self.key_of(item): item for item in items}
+            merged.update(self.pending)
+            self.pending = merged
+        else:
+            self.pending = items + self.pending
+
+    def _write_all(self, items):
+        """max_batch씩 기록 → 다시 시도할 항목 목록 (없으면 [])"""
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            try:
+                self.write_batch(chunk)
+            except Exception:   # 기록 실패로 백그라운드 스레드가 죽지 않게
+                self.failures += 1
+                if self.failures <= self.max_retries:
+                    log.warning("write-behind 기록 실패 (%d건), 재시도 %d/%d",
+                                len(chunk), self.failures, self.max_retries, exc_info=True)
+                    return items[start:]
+                log.exception("write-behind 기록 %d회 실패, %d건 버림", self.failures, len(chunk))
+                self.failures = 0
+                with self.cond:
+                    self.dropped += len(chunk)
+                if self.on_drop:
+                    try:
+                        self.on_drop(chunk)
+                    except Exception:
+                        log.exception("write-behind on_drop 실패")
+            else:
+                self.failures = 0
+        return []
+
+    def _run(self):
+        while True:
+            with self.cond:
+                # 실패 직후에는 버퍼가 차도 기다린다 (interval x 2^실패 횟수, 최대 max_backoff)
+                wait = min(self.interval * 2 ** self.failures, self.max_backoff) if self.failures else self.interval
+                deadline = time.monotonic() + wait
+                while not self.closed and (self.failures or len(self.pending) < self.max_batch):
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self.cond.wait(left)
+                if not self.pending:
+                    if self.closed:
+                        return
+                    continue
+                items, upto = self._take()
+            retry = self._write_all(items)
+            with self.cond:
+                if retry:
+                    self._requeue(retry)   # 기록 안 된 항목은 written에 세지 않는다
+                else:
+                    self.written = upto
+                self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        """지금까지 submit()한 항목이 모두 기록될 때까지 대기.
+        시간 안에 모두 기록되면 True (그 사이 버려진 항목이 있으면 False)."""
+        with self.cond:
+            target, dropped = self.submitted, self.dropped
+            self.cond.notify_all()
+            self.cond.wait_for(lambda: self.written >= target or not self.thread.is_alive(), timeout)
+            return self.written >= target and self.dropped == dropped
+
+    def close(self, timeout=5.0):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)